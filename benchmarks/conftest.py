@@ -0,0 +1,48 @@
+# bw-save-game - BioWare save game tools
+# Copyright (C) 2024 Tim Niederhausen
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Website: https://github.com/timniederhausen/bw_save_game
+# -*- coding: utf-8 -*-
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+
+from bw_save_game.veilguard.synthetic import generate_save_file
+
+_DATA_DIR = Path(__file__).parent.parent / "tests" / "data"
+_ACTUAL_SAVE_GAMES = sorted(_DATA_DIR.glob("*.csav"))
+
+# (fixture, scale) pairs: all bundled saves as-is and synthetic saves generated from the first one
+SAVE_GAME_PARAMS = [(path, 1) for path in _ACTUAL_SAVE_GAMES] + [
+    (_ACTUAL_SAVE_GAMES[0], 10),
+    (_ACTUAL_SAVE_GAMES[0], 100),
+]
+
+
+def _load_save_game_bytes(path: Path, scale: int) -> bytes:
+    if scale == 1:
+        return path.read_bytes()
+    output = BytesIO()
+    with open(path, "rb") as f:
+        generate_save_file(f, output, scale=scale)
+    return output.getvalue()
+
+
+@pytest.fixture(scope="session", params=SAVE_GAME_PARAMS, ids=lambda p: f"{p[0].stem}-x{p[1]}")
+def save_game_bytes(request) -> bytes:
+    """A complete .csav file"""
+    return _load_save_game_bytes(*request.param)
@@ -0,0 +1,73 @@
+# bw-save-game - BioWare save game tools
+# Copyright (C) 2024 Tim Niederhausen
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Website: https://github.com/timniederhausen/bw_save_game
+# -*- coding: utf-8 -*-
+import json
+from io import BytesIO, StringIO
+
+import pytest
+
+from bw_save_game import dumps, loads, read_save_from_reader, write_save_to_writer
+from bw_save_game.db_object import from_raw_dict, to_raw_dict
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture(scope="module")
+def sections(save_game_bytes):
+    return read_save_from_reader(BytesIO(save_game_bytes))
+
+
+@pytest.fixture(scope="module")
+def documents(sections):
+    return tuple(loads(section) for section in sections)
+
+
+@pytest.fixture(scope="module")
+def json_document(documents):
+    return json.dumps(dict(meta=documents[0], data=documents[1]), default=to_raw_dict)
+
+
+@pytest.mark.benchmark(group="container-read")
+def test_read_save(benchmark, save_game_bytes):
+    benchmark(lambda: read_save_from_reader(BytesIO(save_game_bytes)))
+
+
+@pytest.mark.benchmark(group="container-write")
+def test_write_save(benchmark, sections):
+    benchmark(lambda: write_save_to_writer(BytesIO(), *sections))
+
+
+@pytest.mark.benchmark(group="codec-loads")
+def test_loads(benchmark, sections):
+    benchmark(lambda: [loads(section) for section in sections])
+
+
+@pytest.mark.benchmark(group="codec-dumps")
+def test_dumps(benchmark, sections, documents):
+    result = benchmark(lambda: [dumps(document) for document in documents])
+    assert tuple(result) == sections
+
+
+@pytest.mark.benchmark(group="json-export")
+def test_json_export(benchmark, documents):
+    benchmark(lambda: json.dump(dict(meta=documents[0], data=documents[1]), StringIO(), default=to_raw_dict))
+
+
+@pytest.mark.benchmark(group="json-import")
+def test_json_import(benchmark, json_document):
+    benchmark(json.loads, json_document, object_hook=from_raw_dict)
@@ -0,0 +1,55 @@
+# bw-save-game - BioWare save game tools
+# Copyright (C) 2024 Tim Niederhausen
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Website: https://github.com/timniederhausen/bw_save_game
+# -*- coding: utf-8 -*-
+import pytest
+
+from bw_save_game.hash import frostbite_fnv1_lowercase, frostbite_fnv1_lowercase_many
+
+pytest.importorskip("pytest_benchmark")
+
+_ASSET_PATH = b"Characters/Generic/Universal/Makeup/Blush_Makeup/HF_MAK_Blush_12A_Mask"
+_ASSET_PATHS = [_ASSET_PATH + str(i).encode("ascii") for i in range(10000)]
+
+
+def previous_frostbite_fnv1_lowercase(data: bytes):
+    # the byte-by-byte implementation we used before, kept around as our baseline
+    h = 5381
+    for byte in data:
+        v = (byte + 32 * ((byte - 65) & 0xFF <= 0x19)) & 0xFF
+        h = (((33 * h) & 0xFFFFFFFF) ^ v) & 0xFFFFFFFF
+    return h
+
+
+@pytest.mark.benchmark(group="fnv1-single")
+def test_fnv1_lowercase_previous(benchmark):
+    assert benchmark(previous_frostbite_fnv1_lowercase, _ASSET_PATH) == 3828825916
+
+
+@pytest.mark.benchmark(group="fnv1-single")
+def test_fnv1_lowercase(benchmark):
+    assert benchmark(frostbite_fnv1_lowercase, _ASSET_PATH) == 3828825916
+
+
+@pytest.mark.benchmark(group="fnv1-batch")
+def test_fnv1_lowercase_batch_previous(benchmark):
+    benchmark(lambda: [previous_frostbite_fnv1_lowercase(p) for p in _ASSET_PATHS])
+
+
+@pytest.mark.benchmark(group="fnv1-batch")
+def test_fnv1_lowercase_batch(benchmark):
+    benchmark(frostbite_fnv1_lowercase_many, _ASSET_PATHS)
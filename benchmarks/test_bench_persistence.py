@@ -0,0 +1,100 @@
+# bw-save-game - BioWare save game tools
+# Copyright (C) 2024 Tim Niederhausen
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Website: https://github.com/timniederhausen/bw_save_game
+# -*- coding: utf-8 -*-
+from io import BytesIO
+
+import pytest
+
+from bw_save_game import loads, read_save_from_reader
+from bw_save_game.persistence import parse_persistence_key_string
+from bw_save_game.veilguard.highlevel import VeilguardSaveGame
+from bw_save_game.veilguard.persistence import (
+    CHARACTER_GENERATOR_FACTION,
+    CHARACTER_GENERATOR_GENDER,
+    CHARACTER_GENERATOR_IS_TRANS,
+    CHARACTER_GENERATOR_LINEAGE,
+    CHARACTER_GENERATOR_PRONOUNS,
+    CHARACTER_GENERATOR_VOICE,
+    CHARACTER_GENERATOR_VOICE_TONE,
+)
+
+pytest.importorskip("pytest_benchmark")
+
+_PROPERTIES = [
+    CHARACTER_GENERATOR_FACTION,
+    CHARACTER_GENERATOR_GENDER,
+    CHARACTER_GENERATOR_IS_TRANS,
+    CHARACTER_GENERATOR_LINEAGE,
+    CHARACTER_GENERATOR_PRONOUNS,
+    CHARACTER_GENERATOR_VOICE,
+    CHARACTER_GENERATOR_VOICE_TONE,
+]
+
+
+@pytest.fixture(scope="module")
+def save_game(save_game_bytes):
+    return VeilguardSaveGame.from_file(BytesIO(save_game_bytes))
+
+
+@pytest.fixture(scope="module")
+def persistence_keys(save_game):
+    return [instance["Key"] for instance in save_game.get_persistence_instances()]
+
+
+@pytest.mark.benchmark(group="persistence-key-parse")
+def test_parse_persistence_keys(benchmark, persistence_keys):
+    parse = parse_persistence_key_string.__wrapped__  # without the cache
+    benchmark(lambda: [parse(key) for key in persistence_keys])
+
+
+@pytest.mark.benchmark(group="persistence-key-parse-cached")
+def test_parse_persistence_keys_cached(benchmark, persistence_keys):
+    benchmark(lambda: [parse_persistence_key_string(key) for key in persistence_keys])
+
+
+@pytest.mark.benchmark(group="save-game-indexes")
+def test_build_indexes(benchmark, save_game_bytes):
+    meta, data = read_save_from_reader(BytesIO(save_game_bytes))
+
+    def setup():
+        # every round needs fresh (unindexed) trees
+        return (loads(meta), loads(data)), {}
+
+    benchmark.pedantic(VeilguardSaveGame, setup=setup, rounds=20)
+
+
+@pytest.mark.benchmark(group="save-game-get")
+def test_get_persistence_property(benchmark, save_game):
+    benchmark(lambda: [save_game.get_persistence_property(prop) for prop in _PROPERTIES])
+
+
+@pytest.mark.benchmark(group="save-game-get-many")
+def test_get_persistence_properties(benchmark, save_game):
+    benchmark(save_game.get_persistence_properties, _PROPERTIES)
+
+
+@pytest.mark.benchmark(group="save-game-set")
+def test_set_persistence_property(benchmark, save_game):
+    values = {prop: save_game.get_persistence_property(prop) for prop in _PROPERTIES}
+    benchmark(lambda: [save_game.set_persistence_property(prop, value) for prop, value in values.items()])
+
+
+@pytest.mark.benchmark(group="save-game-set-many")
+def test_set_persistence_properties(benchmark, save_game):
+    values = save_game.get_persistence_properties(_PROPERTIES)
+    benchmark(save_game.set_persistence_properties, values)
@@ -0,0 +1,81 @@
+# bw-save-game - BioWare save game tools
+# Copyright (C) 2024 Tim Niederhausen
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Website: https://github.com/timniederhausen/bw_save_game
+# -*- coding: utf-8 -*-
+import os
+import secrets
+import typing
+from contextlib import contextmanager
+
+
+def _fsync_directory(directory: str):
+    # Makes the rename itself durable. Not supported (or needed) on Windows.
+    if os.name != "posix":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _create_temp_file(path: str) -> typing.Tuple[int, str]:
+    # Unlike mkstemp() this lets the kernel apply the umask, so new files get the same mode open() would use
+    directory, name = os.path.split(path)
+    flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, "O_BINARY", 0)
+    while True:
+        temp_path = os.path.join(directory, f".{name}.{secrets.token_hex(4)}.tmp")
+        try:
+            return os.open(temp_path, flags, 0o666), temp_path
+        except FileExistsError:
+            continue
+
+
+@contextmanager
+def atomic_open(path: typing.Union[str, os.PathLike], mode: str = "wb", encoding: str = None, fsync: bool = True):
+    """Open a temporary file that replaces path once the with block completes successfully.
+
+    Readers (and the file system after a crash) either see the old or the new file, never a partial one.
+    With fsync=True, the data is on disk before the old file is replaced.
+    """
+    if "w" not in mode:
+        raise ValueError(f"Invalid mode for atomic_open: {mode}")
+
+    path = os.path.abspath(os.fspath(path))
+    directory = os.path.dirname(path)
+    fd, temp_path = _create_temp_file(path)
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            # Keep the permissions of the file we're replacing
+            try:
+                os.chmod(temp_path, os.stat(path).st_mode & 0o7777)
+            except FileNotFoundError:
+                pass
+            yield f
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+    if fsync:
+        _fsync_directory(directory)
@@ -0,0 +1,69 @@
+# bw-save-game - BioWare save game tools
+# Copyright (C) 2024 Tim Niederhausen
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Website: https://github.com/timniederhausen/bw_save_game
+# -*- coding: utf-8 -*-
+import logging
+import os
+import sys
+import typing
+
+from bw_save_game.atomic_file import atomic_open
+
+_logger = logging.getLogger(__name__)
+
+CACHE_DIR_ENV = "BW_SAVE_GAME_CACHE_DIR"
+
+
+def get_cache_dir() -> typing.Optional[str]:
+    """Return the directory for our on-disk caches or None if caching is disabled.
+
+    Setting BW_SAVE_GAME_CACHE_DIR overrides the default location, an empty value disables caching.
+    """
+    path = os.environ.get(CACHE_DIR_ENV)
+    if path is not None:
+        return path or None
+
+    if sys.platform.startswith("win"):
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~/AppData/Local")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "bw_save_game")
+
+
+def get_cache_path(*parts: str) -> typing.Optional[str]:
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        return None
+    return os.path.join(cache_dir, *parts)
+
+
+def write_cache_file(path: str, content: bytes) -> bool:
+    """Replace the cache file at path with content.
+
+    Caches are strictly optional, so failures are logged and otherwise ignored.
+    Concurrent readers either see the old or the new file, never a partial one.
+    """
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with atomic_open(path, "wb", fsync=False) as f:
+            f.write(content)
+    except OSError as e:
+        _logger.debug("Cannot write cache file %s: %r", path, e)
+        return False
+    return True
@@ -21,6 +21,8 @@ import gzip
 import typing
 import zlib
 
+from bw_save_game.profiling import AnyStats, get_stats
+
 MAGIC = b"<!--DAS"
 CURRENT_FORMAT_VERSION = 2
 CRC32_STARTING_VALUE = 0xA018471F
@@ -45,26 +47,23 @@ class SaveLoadingError(ValueError):
     pass
 
 
-def read_save_from_reader(reader: typing.BinaryIO, expected_save_type: bytes = b"C", strict=True):
-    magic = reader.read(7)
-    if magic != MAGIC:
-        raise SaveLoadingError(f"Invalid magic bytes: {magic} != {MAGIC}")
-
-    save_type = reader.read(1)
-    if expected_save_type is not None and save_type != expected_save_type:
-        raise SaveLoadingError(f"Invalid save type: ${save_type} != {expected_save_type}")
-
-    header = SaveHeader.from_buffer_copy(reader.read(ctypes.sizeof(SaveHeader)))
-    if header.formatversion != CURRENT_FORMAT_VERSION:
-        raise SaveLoadingError(f"Invalid format version: {header.formatversion} != {CURRENT_FORMAT_VERSION}")
-
-    meta = reader.read(header.meta_compressed_length)
-    data = reader.read(header.data_compressed_length)
+def read_save_from_reader(
+    reader: typing.BinaryIO,
+    expected_save_type: bytes = b"C",
+    strict=True,
+    stats: typing.Optional[AnyStats] = None,
+):
+    stats = get_stats(stats)
+    with stats.stage("read") as s:
+        meta, data, header = _read_sections(reader, expected_save_type)
+        s.bytes_out += len(meta) + len(data)
 
     # If we want to be sure, verify the integrity of our compressed data
     if strict:
-        actual_meta_checksum = zlib.crc32(meta, CRC32_STARTING_VALUE)
-        actual_data_checksum = zlib.crc32(data, CRC32_STARTING_VALUE)
+        with stats.stage("crc") as s:
+            actual_meta_checksum = zlib.crc32(meta, CRC32_STARTING_VALUE)
+            actual_data_checksum = zlib.crc32(data, CRC32_STARTING_VALUE)
+            s.bytes_in += len(meta) + len(data)
 
         if header.meta_checksum != actual_meta_checksum:
             raise SaveLoadingError(f"Invalid meta checksum: {header.meta_checksum} != {actual_meta_checksum}")
@@ -72,8 +71,11 @@ def read_save_from_reader(reader: typing.BinaryIO, expected_save_type: bytes = b
             raise SaveLoadingError(f"Invalid data checksum: {header.data_checksum} != {actual_data_checksum}")
 
     # all good, so now we just have to decompress
-    meta = gzip.decompress(meta)
-    data = gzip.decompress(data)
+    with stats.stage("gunzip") as s:
+        s.bytes_in += len(meta) + len(data)
+        meta = gzip.decompress(meta)
+        data = gzip.decompress(data)
+        s.bytes_out += len(meta) + len(data)
 
     assert len(meta) == header.meta_length
     assert len(data) == header.data_length
@@ -81,27 +83,54 @@ def read_save_from_reader(reader: typing.BinaryIO, expected_save_type: bytes = b
     return meta, data
 
 
+def _read_sections(reader: typing.BinaryIO, expected_save_type: typing.Optional[bytes]):
+    magic = reader.read(7)
+    if magic != MAGIC:
+        raise SaveLoadingError(f"Invalid magic bytes: {magic} != {MAGIC}")
+
+    save_type = reader.read(1)
+    if expected_save_type is not None and save_type != expected_save_type:
+        raise SaveLoadingError(f"Invalid save type: ${save_type} != {expected_save_type}")
+
+    header = SaveHeader.from_buffer_copy(reader.read(ctypes.sizeof(SaveHeader)))
+    if header.formatversion != CURRENT_FORMAT_VERSION:
+        raise SaveLoadingError(f"Invalid format version: {header.formatversion} != {CURRENT_FORMAT_VERSION}")
+
+    meta = reader.read(header.meta_compressed_length)
+    data = reader.read(header.data_compressed_length)
+    return meta, data, header
+
+
 def write_save_to_writer(
     writer: typing.BinaryIO,
     meta: typing.ByteString,
     data: typing.ByteString,
     save_type: bytes = b"C",
+    stats: typing.Optional[AnyStats] = None,
 ):
+    stats = get_stats(stats)
     header = SaveHeader()
     header.formatversion = CURRENT_FORMAT_VERSION
     header.data_length = len(data)
     header.meta_length = len(meta)
 
-    meta = gzip.compress(meta)
-    data = gzip.compress(data)
+    with stats.stage("gzip") as s:
+        s.bytes_in += len(meta) + len(data)
+        meta = gzip.compress(meta)
+        data = gzip.compress(data)
+        s.bytes_out += len(meta) + len(data)
 
-    header.data_checksum = zlib.crc32(data, CRC32_STARTING_VALUE)
+    with stats.stage("crc") as s:
+        header.data_checksum = zlib.crc32(data, CRC32_STARTING_VALUE)
+        header.meta_checksum = zlib.crc32(meta, CRC32_STARTING_VALUE)
+        s.bytes_in += len(meta) + len(data)
     header.data_compressed_length = len(data)
-    header.meta_checksum = zlib.crc32(meta, CRC32_STARTING_VALUE)
     header.meta_compressed_length = len(meta)
 
-    writer.write(MAGIC)
-    writer.write(save_type)
-    writer.write(bytes(header))
-    writer.write(meta)
-    writer.write(data)
+    with stats.stage("write") as s:
+        writer.write(MAGIC)
+        writer.write(save_type)
+        writer.write(bytes(header))
+        writer.write(meta)
+        writer.write(data)
+        s.bytes_in += len(MAGIC) + len(save_type) + ctypes.sizeof(header) + len(meta) + len(data)
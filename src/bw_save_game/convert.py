@@ -22,9 +22,11 @@ import logging
 import sys
 
 from bw_save_game import __version__
+from bw_save_game.atomic_file import atomic_open
 from bw_save_game.container import read_save_from_reader, write_save_to_writer
 from bw_save_game.db_object import from_raw_dict, to_raw_dict
 from bw_save_game.db_object_codec import dumps, loads
+from bw_save_game.profiling import PipelineStats, get_stats
 
 __author__ = "Tim Niederhausen"
 __copyright__ = "Tim Niederhausen"
@@ -36,37 +38,41 @@ _logger = logging.getLogger(__name__)
 # ---- Python API ----
 
 
-def csav_to_json(filename, output):
+def csav_to_json(filename, output, stats=None):
+    stats = get_stats(stats)
     with open(filename, "rb") as f:
-        m, d = read_save_from_reader(f)
+        m, d = read_save_from_reader(f, stats=stats)
 
-    m = loads(m)
-    d = loads(d)
+    m = loads(m, stats=stats)
+    d = loads(d, stats=stats)
 
-    if output == "-":
-        json.dump(dict(meta=m, data=d), sys.stdout, indent=2, default=to_raw_dict)
-    else:
-        with open(output, "w", encoding="utf-8") as f:
-            json.dump(dict(meta=m, data=d), f, indent=2, default=to_raw_dict)
+    with stats.stage("json dump"):
+        if output == "-":
+            json.dump(dict(meta=m, data=d), sys.stdout, indent=2, default=to_raw_dict)
+        else:
+            with atomic_open(output, "w", encoding="utf-8") as f:
+                json.dump(dict(meta=m, data=d), f, indent=2, default=to_raw_dict)
 
 
-def json_to_csav(filename, output):
-    with open(filename, "r", encoding="utf-8") as f:
-        doc = json.load(f, object_hook=from_raw_dict)
+def json_to_csav(filename, output, stats=None):
+    stats = get_stats(stats)
+    with stats.stage("json load"):
+        with open(filename, "r", encoding="utf-8") as f:
+            doc = json.load(f, object_hook=from_raw_dict)
 
     m = doc["meta"]
     d = doc["data"]
 
     # re-encode our object tree into a DbObject byte string
-    m = dumps(m)
-    d = dumps(d)
+    m = dumps(m, stats=stats)
+    d = dumps(d, stats=stats)
 
     if output == "-":
         # TODO: warn if not a binary stream?
-        write_save_to_writer(sys.stdout, m, d)
+        write_save_to_writer(sys.stdout, m, d, stats=stats)
     else:
-        with open(output, "wb") as f:
-            write_save_to_writer(f, m, d)
+        with atomic_open(output, "wb") as f:
+            write_save_to_writer(f, m, d, stats=stats)
 
 
 # ---- CLI ----
@@ -102,6 +108,11 @@ def register_common_args(parser):
         action="store_const",
         const=logging.DEBUG,
     )
+    parser.add_argument(
+        "--profile",
+        help="print the time spent in each stage (and the processed bytes / objects) to stderr",
+        action="store_true",
+    )
 
 
 def parse_from_bin_args(args):
@@ -148,16 +159,25 @@ def setup_logging(loglevel):
     logging.basicConfig(level=loglevel, stream=sys.stdout, format=logformat, datefmt="%Y-%m-%d %H:%M:%S")
 
 
+def print_profile(stats):
+    if stats is not None:
+        print(stats.format_report(), file=sys.stderr)
+
+
 def run_to_json():
     args = parse_from_bin_args(sys.argv[1:])
     setup_logging(args.loglevel)
-    csav_to_json(args.input, args.output)
+    stats = PipelineStats() if args.profile else None
+    csav_to_json(args.input, args.output, stats)
+    print_profile(stats)
 
 
 def run_to_bin():
     args = parse_from_json_args(sys.argv[1:])
     setup_logging(args.loglevel)
-    json_to_csav(args.input, args.output)
+    stats = PipelineStats() if args.profile else None
+    json_to_csav(args.input, args.output, stats)
+    print_profile(stats)
 
 
 if __name__ == "__main__":
@@ -17,6 +17,7 @@
 # Website: https://github.com/timniederhausen/bw_save_game
 # -*- coding: utf-8 -*-
 import struct
+import typing
 from decimal import Decimal
 from io import BytesIO
 from uuid import UUID
@@ -34,6 +35,7 @@ from .db_object import (
     VarInt,
     Vector4D,
 )
+from .profiling import AnyStats, count_objects, get_stats
 
 
 class UnknownSerializerError(TypeError):
@@ -380,9 +382,22 @@ def decode_document(data, base, as_array=False, with_envelope=True):
     return end_point, retval
 
 
-def dumps(obj, on_unknown=None):
-    return encode_document({None: obj}, with_envelope=False, on_unknown=on_unknown)
-
-
-def loads(data):
-    return decode_document(data, 0, with_envelope=False)[1][None]
+def dumps(obj, on_unknown=None, stats: typing.Optional[AnyStats] = None):
+    stats = get_stats(stats)
+    with stats.stage("encode") as s:
+        data = encode_document({None: obj}, with_envelope=False, on_unknown=on_unknown)
+        s.bytes_out += len(data)
+    if stats.enabled:
+        # Not part of the timed stage, counting is about as expensive as a lot of our other work
+        s.objects += count_objects(obj)
+    return data
+
+
+def loads(data, stats: typing.Optional[AnyStats] = None):
+    stats = get_stats(stats)
+    with stats.stage("decode") as s:
+        obj = decode_document(data, 0, with_envelope=False)[1][None]
+        s.bytes_in += len(data)
+    if stats.enabled:
+        s.objects += count_objects(obj)
+    return obj
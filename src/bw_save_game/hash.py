@@ -1,9 +1,34 @@
+import hashlib
+import struct
+import typing
+from io import BytesIO
+
+from bw_save_game.cache import write_cache_file
+
+_FNV1_OFFSET_BASIS = 5381
+_FNV1_MASK = 0xFFFFFFFF
+
+# The low 32 bits of (h * 33) ^ byte only depend on the low 32 bits of h, so we can
+# let h grow for a few bytes before masking it - that saves most of the per-byte arithmetic
+# while keeping the intermediate Python ints small.
+_FNV1_MASK_INTERVAL = 32
+
+# Frostbite only lowercases ASCII A-Z, which is exactly what this table does.
+_LOWERCASE_TABLE = bytes.maketrans(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ", b"abcdefghijklmnopqrstuvwxyz")
+
+
+def _fnv1(data: bytes) -> int:
+    h = _FNV1_OFFSET_BASIS
+    for i in range(0, len(data), _FNV1_MASK_INTERVAL):
+        for byte in data[i : i + _FNV1_MASK_INTERVAL]:
+            h = h * 33 ^ byte
+        h &= _FNV1_MASK
+    return h
+
+
 def frostbite_fnv1(data: bytes):
     assert isinstance(data, bytes)
-    h = 5381
-    for byte in data:
-        h = (((33 * h) & 0xFFFFFFFF) ^ byte) & 0xFFFFFFFF
-    return h
+    return _fnv1(data)
 
 
 def frostbite_fnv1_lowercase(data: bytes):
@@ -13,8 +38,114 @@ def frostbite_fnv1_lowercase(data: bytes):
     3828825916
     """
     assert isinstance(data, bytes)
-    h = 5381
-    for byte in data:
-        v = (byte + 32 * ((byte - 65) & 0xFF <= 0x19)) & 0xFF
-        h = (((33 * h) & 0xFFFFFFFF) ^ v) & 0xFFFFFFFF
-    return h
+    return _fnv1(data.translate(_LOWERCASE_TABLE))
+
+
+def _as_bytes(value: typing.Union[str, bytes]) -> bytes:
+    if isinstance(value, str):
+        return value.encode("utf-8")
+    return value
+
+
+def frostbite_fnv1_many(values: typing.Iterable[typing.Union[str, bytes]]) -> typing.List[int]:
+    """Return the FNV1 32bit hashes for all values (strings are UTF-8 encoded first)."""
+    return [_fnv1(_as_bytes(value)) for value in values]
+
+
+def frostbite_fnv1_lowercase_many(values: typing.Iterable[typing.Union[str, bytes]]) -> typing.List[int]:
+    """Return the lowercase FNV1 32bit hashes for all values (strings are UTF-8 encoded first).
+
+    >>> frostbite_fnv1_lowercase_many(["ParamName", b"paramname"])
+    [1011542061, 1011542061]
+    """
+    return [_fnv1(_as_bytes(value).translate(_LOWERCASE_TABLE)) for value in values]
+
+
+class HashNameRegistry(object):
+    """Reverse lookup table (hash -> name) for hashed identifiers.
+
+    Names are hashed in bulk with frostbite_fnv1_lowercase(). Since that's still
+    expensive for large name lists, the resulting table can be stored in a compact
+    cache file that is only valid for the exact same list of names.
+    """
+
+    _CACHE_HEADER = struct.Struct("<4sI20sI")
+    _CACHE_MAGIC = b"BWHN"
+    _CACHE_VERSION = 1
+
+    def __init__(self):
+        self._names = {}  # type: typing.Dict[int, str]
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, hash_value: int):
+        return hash_value in self._names
+
+    def get(self, hash_value: int, default=None) -> typing.Optional[str]:
+        return self._names.get(hash_value, default)
+
+    def items(self):
+        return self._names.items()
+
+    def add(self, hash_value: int, name: str):
+        # The first name registered for a hash wins
+        self._names.setdefault(hash_value, name)
+
+    def update(self, pairs: typing.Iterable[typing.Tuple[int, str]]):
+        for hash_value, name in pairs:
+            self._names.setdefault(hash_value, name)
+
+    def add_names(self, names: typing.Iterable[str]):
+        names = list(names)
+        self.update(zip(frostbite_fnv1_lowercase_many(names), names))
+
+    @staticmethod
+    def digest_names(names: typing.Sequence[str]) -> bytes:
+        return hashlib.sha1("\0".join(names).encode("utf-8")).digest()
+
+    def save(self, fp: typing.BinaryIO, digest: bytes):
+        hashes = list(self._names.keys())
+        fp.write(self._CACHE_HEADER.pack(self._CACHE_MAGIC, self._CACHE_VERSION, digest, len(hashes)))
+        fp.write(struct.pack(f"<{len(hashes)}I", *hashes))
+        fp.write("\0".join(self._names.values()).encode("utf-8"))
+
+    def load(self, fp: typing.BinaryIO, digest: bytes) -> bool:
+        """Load a table written by save(), returns False if it doesn't match digest."""
+        header = fp.read(self._CACHE_HEADER.size)
+        if len(header) != self._CACHE_HEADER.size:
+            return False
+        magic, version, cached_digest, count = self._CACHE_HEADER.unpack(header)
+        if magic != self._CACHE_MAGIC or version != self._CACHE_VERSION or cached_digest != digest:
+            return False
+
+        hashes = struct.unpack(f"<{count}I", fp.read(4 * count))
+        names = fp.read().decode("utf-8").split("\0") if count else []
+        if len(names) != count:
+            return False
+        self._names.update(zip(hashes, names))
+        return True
+
+    @classmethod
+    def from_names(cls, names: typing.Iterable[str], cache_path: typing.Optional[str] = None) -> "HashNameRegistry":
+        """Build a registry for names, re-using the table at cache_path if it's still up-to-date."""
+        names = list(names)
+        registry = cls()
+        if cache_path is None:
+            registry.add_names(names)
+            return registry
+
+        digest = cls.digest_names(names)
+        try:
+            with open(cache_path, "rb") as f:
+                if registry.load(f, digest):
+                    return registry
+        except (OSError, ValueError, struct.error):
+            pass
+
+        registry = cls()
+        registry.add_names(names)
+        buf = BytesIO()
+        registry.save(buf, digest)
+        write_cache_file(cache_path, buf.getvalue())
+        return registry
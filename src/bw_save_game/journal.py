@@ -0,0 +1,219 @@
+# bw-save-game - BioWare save game tools
+# Copyright (C) 2024 Tim Niederhausen
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Website: https://github.com/timniederhausen/bw_save_game
+# -*- coding: utf-8 -*-
+import time
+import typing
+from contextlib import contextmanager
+
+# Marks a dict key that didn't exist before / after an edit
+MISSING = object()
+
+# Operation kinds
+_SET = 0  # container[key] = new (old might be MISSING)
+_INSERT = 1  # container.insert(key, new)
+_DELETE = 2  # del container[key] (old is the removed value)
+
+
+class _Operation(object):
+    __slots__ = ("kind", "container", "key", "old", "new", "time")
+
+    def __init__(self, kind: int, container, key, old, new):
+        self.kind = kind
+        self.container = container
+        self.key = key
+        self.old = old
+        self.new = new
+        self.time = time.monotonic()
+
+    def undo(self):
+        if self.kind == _SET:
+            _assign(self.container, self.key, self.old)
+        elif self.kind == _INSERT:
+            del self.container[self.key]
+        else:
+            self.container.insert(self.key, self.old)
+
+    def redo(self):
+        if self.kind == _SET:
+            _assign(self.container, self.key, self.new)
+        elif self.kind == _INSERT:
+            self.container.insert(self.key, self.new)
+        else:
+            del self.container[self.key]
+
+
+def _assign(container, key, value):
+    if value is MISSING:
+        del container[key]
+    else:
+        container[key] = value
+
+
+class EditJournal(object):
+    """Undo/redo log of edits to a (DbObject) tree.
+
+    Only the changed values are stored, not snapshots of the tree. Edits have to be made
+    through set()/insert()/delete() (or be reported with record()) to be undoable.
+    Edits inside a group() are undone and redone together.
+    """
+
+    def __init__(self, max_entries: int = 1000, merge_interval: float = 1.0):
+        self.max_entries = max_entries
+        # Repeated edits of the same value within this many seconds are merged into one (e.g. dragging a slider)
+        self.merge_interval = merge_interval
+        # Incremented whenever the journal changes the tree (undo/redo), so callers can refresh cached data
+        self.version = 0
+
+        self._undo_stack = []  # type: typing.List[typing.List[_Operation]]
+        self._redo_stack = []  # type: typing.List[typing.List[_Operation]]
+        self._group = None  # type: typing.Optional[typing.List[_Operation]]
+        self._group_depth = 0
+        self._can_merge = False
+
+    def can_undo(self) -> bool:
+        return bool(self._undo_stack)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo_stack)
+
+    def __len__(self):
+        return len(self._undo_stack)
+
+    def clear(self):
+        self._undo_stack.clear()
+        self._redo_stack.clear()
+        self._can_merge = False
+
+    def _add(self, operation: _Operation):
+        self._redo_stack.clear()
+        if self._group is not None:
+            self._group.append(operation)
+            return
+
+        self._push_or_merge([operation])
+
+    def _push_or_merge(self, operations: typing.List[_Operation]):
+        if self._can_merge and self._merge(operations):
+            return
+        self._push(operations)
+        # Only steps that just set values can be merged with the next one
+        self._can_merge = all(operation.kind == _SET for operation in operations)
+
+    def _merge(self, operations: typing.List[_Operation]) -> bool:
+        # Merge into the last step if it set the same values (in the same order) a moment ago
+        last_entry = self._undo_stack[-1]
+        if len(last_entry) != len(operations):
+            return False
+        for last, operation in zip(last_entry, operations):
+            if (
+                operation.kind != _SET
+                # Adding / removing keys isn't a continuous edit
+                or operation.new is MISSING
+                or last.new is MISSING
+                or last.container is not operation.container
+                or last.key != operation.key
+                or operation.time - last.time >= self.merge_interval
+            ):
+                return False
+        for last, operation in zip(last_entry, operations):
+            last.new = operation.new
+            last.time = operation.time
+        return True
+
+    def _push(self, operations: typing.List[_Operation]):
+        self._undo_stack.append(operations)
+        if len(self._undo_stack) > self.max_entries:
+            del self._undo_stack[0]
+
+    def record(self, container, key, old_value, new_value):
+        """Record an edit that was already made: container[key] was changed from old_value to new_value.
+
+        Pass MISSING as old_value for newly added dict keys.
+        """
+        self._add(_Operation(_SET, container, key, old_value, new_value))
+
+    def set(self, container, key, value):
+        """container[key] = value"""
+        old_value = container[key] if isinstance(container, list) else container.get(key, MISSING)
+        container[key] = value
+        self.record(container, key, old_value, value)
+
+    def insert(self, container: list, index: int, value):
+        """container.insert(index, value)"""
+        if index < 0:
+            index = max(0, len(container) + index)
+        index = min(index, len(container))
+        container.insert(index, value)
+        self._add(_Operation(_INSERT, container, index, MISSING, value))
+
+    def append(self, container: list, value):
+        self.insert(container, len(container), value)
+
+    def pop(self, container: dict, key):
+        """container.pop(key, None), but only recorded if key existed"""
+        if key in container:
+            self.delete(container, key)
+
+    def delete(self, container, key):
+        """del container[key]"""
+        old_value = container[key]
+        if isinstance(container, list):
+            if key < 0:
+                key += len(container)
+            del container[key]
+            self._add(_Operation(_DELETE, container, key, old_value, MISSING))
+        else:
+            del container[key]
+            self.record(container, key, old_value, MISSING)
+
+    @contextmanager
+    def group(self):
+        """Edits inside the with block become a single undo step."""
+        if self._group_depth == 0:
+            self._group = []
+        self._group_depth += 1
+        try:
+            yield self
+        finally:
+            self._group_depth -= 1
+            if self._group_depth == 0:
+                operations, self._group = self._group, None
+                if operations:
+                    self._push_or_merge(operations)
+
+    def undo(self) -> bool:
+        if not self._undo_stack or self._group is not None:
+            return False
+        operations = self._undo_stack.pop()
+        for operation in reversed(operations):
+            operation.undo()
+        self._redo_stack.append(operations)
+        self._can_merge = False
+        self.version += 1
+        return True
+
+    def redo(self) -> bool:
+        if not self._redo_stack or self._group is not None:
+            return False
+        operations = self._redo_stack.pop()
+        for operation in operations:
+            operation.redo()
+        self._undo_stack.append(operations)
+        self._can_merge = False
+        self.version += 1
+        return True
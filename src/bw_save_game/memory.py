@@ -0,0 +1,97 @@
+# bw-save-game - BioWare save game tools
+# Copyright (C) 2024 Tim Niederhausen
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Website: https://github.com/timniederhausen/bw_save_game
+# -*- coding: utf-8 -*-
+import enum
+import sys
+import typing
+from collections import Counter
+
+# Objects without references to other objects we'd want to count (enum members are shared singletons)
+_LEAF_TYPES = (str, bytes, int, float, bool, type(None), enum.Enum)
+
+
+class MemoryUsage(object):
+    """Python memory used by an object tree: total size and counts / sizes per type."""
+
+    def __init__(self):
+        self.size = 0
+        self.objects = 0
+        self.counts = Counter()  # type: typing.Counter[str]
+        self.sizes = Counter()  # type: typing.Counter[str]
+
+    def add(self, other: "MemoryUsage"):
+        self.size += other.size
+        self.objects += other.objects
+        self.counts.update(other.counts)
+        self.sizes.update(other.sizes)
+
+    def format_report(self, limit: int = 20) -> str:
+        lines = [f"{self.size} bytes in {self.objects} objects"]
+        for name, size in self.sizes.most_common(limit):
+            lines.append(f"  {name:<24} {self.counts[name]:>10} {size:>12}")
+        return "\n".join(lines)
+
+
+def _get_slot_values(value) -> typing.Iterator:
+    for cls in type(value).__mro__:
+        slots = cls.__dict__.get("__slots__", ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        for name in slots:
+            if name not in ("__dict__", "__weakref__") and hasattr(value, name):
+                yield getattr(value, name)
+
+
+def measure(root, seen: typing.Optional[typing.Set[int]] = None) -> MemoryUsage:
+    """Measure the deep size of root (dicts, lists, DbObject wrappers, ...).
+
+    Objects that are reachable more than once are only counted once. Passing the same seen set
+    to several calls does the same across them, so shared objects are counted where they're found first.
+    """
+    if seen is None:
+        seen = set()
+
+    usage = MemoryUsage()
+    pending = [root]
+    while pending:
+        value = pending.pop()
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+
+        size = sys.getsizeof(value)
+        if not isinstance(value, _LEAF_TYPES):
+            if isinstance(value, dict):
+                pending.extend(value.keys())
+                pending.extend(value.values())
+            elif isinstance(value, (list, tuple, set, frozenset)):
+                pending.extend(value)
+            attributes = getattr(value, "__dict__", None)
+            if attributes is not None and id(attributes) not in seen:
+                # e.g. our dataclasses (Long, Vector4D, ...), counted as part of their object
+                seen.add(id(attributes))
+                size += sys.getsizeof(attributes)
+                pending.extend(attributes.values())
+            pending.extend(_get_slot_values(value))
+
+        name = type(value).__name__
+        usage.size += size
+        usage.objects += 1
+        usage.counts[name] += 1
+        usage.sizes[name] += size
+    return usage
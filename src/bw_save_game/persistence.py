@@ -17,10 +17,13 @@
 # Website: https://github.com/timniederhausen/bw_save_game
 # -*- coding: utf-8 -*-
 import typing
+from collections import defaultdict
 from dataclasses import dataclass
 from enum import Enum
+from functools import lru_cache
 
 from bw_save_game.db_object import Long, to_native
+from bw_save_game.journal import EditJournal
 
 
 class PersistenceFamilyId(Enum):
@@ -49,24 +52,59 @@ _DEFAULT_PERSONA_ID = 0xC0FFEEEE
 _UID_PREFIX = "uid="
 
 
-@dataclass(unsafe_hash=True)
-class PersistenceKey:
-    version: int  # usually 7
-    family: PersistenceFamilyId
-    definition_id: int = 0
-    last: int = None  # TODO: unknown function so far
-
-    def __post_init__(self):
-        if self.last is None:
-            definition_id = self.definition_id & 0xFFFFFFFF
+class PersistenceKey(object):
+    # Keys are immutable & shared (see parse_persistence_key_string), so we hand-roll what
+    # @dataclass(frozen=True) would give us with a smaller, __slots__-based memory footprint.
+    __slots__ = ("version", "family", "definition_id", "last", "_hash")
+    _fields = ("version", "family", "definition_id", "last")
+
+    def __init__(
+        self,
+        version: int,  # usually 7
+        family: PersistenceFamilyId,
+        definition_id: int = 0,
+        last: int = None,  # TODO: unknown function so far
+    ):
+        if last is None:
+            definition_id_u32 = definition_id & 0xFFFFFFFF
             if (
-                (definition_id & 0x80000000) != 0
-                or definition_id - 1 <= 0xFFFFFFFD
-                or (definition_id & 0x40000000) != 0
+                (definition_id_u32 & 0x80000000) != 0
+                or definition_id_u32 - 1 <= 0xFFFFFFFD
+                or (definition_id_u32 & 0x40000000) != 0
             ):
-                self.last = 0
+                last = 0
             else:
-                self.last = -1
+                last = -1
+
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "family", family)
+        object.__setattr__(self, "definition_id", definition_id)
+        object.__setattr__(self, "last", last)
+        object.__setattr__(self, "_hash", hash(self._astuple()))
+
+    def _astuple(self):
+        return tuple(getattr(self, name) for name in self._fields)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"cannot assign to field '{name}' of immutable {type(self).__name__}")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"cannot delete field '{name}' of immutable {type(self).__name__}")
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._hash == other._hash and self._astuple() == other._astuple()
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return self.__class__, self._astuple()
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"{type(self).__name__}({values})"
 
     def _collect_values(self, sep):
         return f"{self.definition_id}{sep}{self.last}"
@@ -75,18 +113,41 @@ class PersistenceKey:
         return f"{self.version}:{self.family.name}:{self._collect_values('|' if self.version >= 6 else '.')}"
 
 
-@dataclass(unsafe_hash=True)
 class EcoPersistenceKey(PersistenceKey):
-    first: int = 0  # TODO: unknown function so far
-    second: int = 0  # TODO: unknown function so far
+    __slots__ = ("first", "second")
+    _fields = PersistenceKey._fields + __slots__
+
+    def __init__(
+        self,
+        version: int,
+        family: PersistenceFamilyId,
+        definition_id: int = 0,
+        last: int = None,
+        first: int = 0,  # TODO: unknown function so far
+        second: int = 0,  # TODO: unknown function so far
+    ):
+        object.__setattr__(self, "first", first)
+        object.__setattr__(self, "second", second)
+        super().__init__(version, family, definition_id, last)
 
     def _collect_values(self, sep):
         return f"{self.first}{sep}{self.second}{sep}{super()._collect_values(sep)}"
 
 
-@dataclass(unsafe_hash=True)
 class PersistenceKeyWithUniqueId(PersistenceKey):
-    uid: typing.Optional[int] = None  # TODO: where do these come from?
+    __slots__ = ("uid",)
+    _fields = PersistenceKey._fields + __slots__
+
+    def __init__(
+        self,
+        version: int,
+        family: PersistenceFamilyId,
+        definition_id: int = 0,
+        last: int = None,
+        uid: typing.Optional[int] = None,  # TODO: where do these come from?
+    ):
+        object.__setattr__(self, "uid", uid)
+        super().__init__(version, family, definition_id, last)
 
     def _collect_values(self, sep):
         if self.uid is not None:
@@ -94,14 +155,32 @@ class PersistenceKeyWithUniqueId(PersistenceKey):
         return super()._collect_values(sep)
 
 
-@dataclass(unsafe_hash=True)
 class RegisteredPersistenceKey(PersistenceKeyWithUniqueId):
-    persona_id: int = _DEFAULT_PERSONA_ID
+    __slots__ = ("persona_id",)
+    _fields = PersistenceKeyWithUniqueId._fields + __slots__
+
+    def __init__(
+        self,
+        version: int,
+        family: PersistenceFamilyId,
+        definition_id: int = 0,
+        last: int = None,
+        uid: typing.Optional[int] = None,
+        persona_id: int = _DEFAULT_PERSONA_ID,
+    ):
+        object.__setattr__(self, "persona_id", persona_id)
+        super().__init__(version, family, definition_id, last, uid)
 
     def _collect_values(self, sep):
         return f"{self.persona_id}{sep}{super()._collect_values(sep)}"
 
 
+# Every save contains thousands of persistence instances whose keys we parse on load.
+# The resulting keys are immutable, so identical key strings can share a single object.
+_PERSISTENCE_KEY_CACHE_SIZE = 16384
+
+
+@lru_cache(maxsize=_PERSISTENCE_KEY_CACHE_SIZE)
 def parse_persistence_key_string(key_str: str):
     colon_separated = key_str.split(":", 3)
     if len(colon_separated) < 3:
@@ -164,6 +243,121 @@ def registered_persistence_key(definition_id: int) -> RegisteredPersistenceKey:
     return RegisteredPersistenceKey(version=7, family=PersistenceFamilyId.Registered, definition_id=definition_id)
 
 
+class PersistenceInstanceList(list):
+    """A list of persistence instances that keeps its lookup indexes in sync.
+
+    Every mutating list operation updates ``definition_id_to_instances`` and ``key_to_instance``,
+    so edits made directly on the list can't leave stale indexes behind.
+    Both indexes follow the list order: the per-definition lists are sorted by position
+    and the last instance (in the list) with a given key wins.
+    """
+
+    def __init__(self, instances: typing.Iterable[dict] = ()):
+        super().__init__()
+        self.definition_id_to_instances = defaultdict(list)  # type: typing.DefaultDict[int, typing.List[dict]]
+        self.key_to_instance = {}  # type: typing.Dict[PersistenceKey, dict]
+        self.extend(instances)
+
+    def __reduce__(self):
+        return self.__class__, (list(self),)
+
+    def _rebuild_index(self):
+        # Used for operations that don't just add to the end (those keep the indexes in list order)
+        self.definition_id_to_instances.clear()
+        self.key_to_instance.clear()
+        for instance in self:
+            self._add_to_index(instance)
+
+    def _add_to_index(self, instance: dict):
+        self.definition_id_to_instances[to_native(instance["DefinitionId"])].append(instance)
+        # The last instance with a given key wins
+        self.key_to_instance[parse_persistence_key_string(instance["Key"])] = instance
+
+    def _remove_from_index(self, instance: dict):
+        same_definition = self.definition_id_to_instances[to_native(instance["DefinitionId"])]
+        for i, other in enumerate(same_definition):
+            if other is instance:
+                del same_definition[i]
+                break
+
+        key = parse_persistence_key_string(instance["Key"])
+        if self.key_to_instance.get(key) is not instance:
+            return
+        # Fall back to the next-to-last instance with the same key (if any)
+        for other in reversed(same_definition):
+            if parse_persistence_key_string(other["Key"]) == key:
+                self.key_to_instance[key] = other
+                return
+        del self.key_to_instance[key]
+
+    def append(self, instance: dict):
+        super().append(instance)
+        self._add_to_index(instance)
+
+    def extend(self, instances: typing.Iterable[dict]):
+        instances = list(instances)
+        super().extend(instances)
+        for instance in instances:
+            self._add_to_index(instance)
+
+    def __iadd__(self, instances: typing.Iterable[dict]):
+        self.extend(instances)
+        return self
+
+    def __imul__(self, n: int):
+        if n <= 0:
+            self.clear()
+        else:
+            self.extend(list(self) * (n - 1))
+        return self
+
+    def insert(self, index: int, instance: dict):
+        at_end = index >= len(self)
+        super().insert(index, instance)
+        if at_end:
+            self._add_to_index(instance)
+        else:
+            self._rebuild_index()
+
+    def pop(self, index: int = -1) -> dict:
+        instance = super().pop(index)
+        self._remove_from_index(instance)
+        return instance
+
+    def remove(self, instance: dict):
+        # Unlike list.remove() this looks for the same instance, not just an equal one
+        for i, other in enumerate(self):
+            if other is instance:
+                self.pop(i)
+                return
+        raise ValueError("PersistenceInstanceList.remove(x): x not in list")
+
+    def clear(self):
+        super().clear()
+        self.definition_id_to_instances.clear()
+        self.key_to_instance.clear()
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            value = list(value)
+        super().__setitem__(index, value)
+        self._rebuild_index()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._rebuild_index()
+
+    def reverse(self):
+        super().reverse()
+        self._rebuild_index()
+
+    def __delitem__(self, index):
+        old_instances = self[index] if isinstance(index, slice) else [self[index]]
+        super().__delitem__(index)
+        for instance in old_instances:
+            self._remove_from_index(instance)
+
+
 @dataclass(frozen=True)
 class PersistencePropertyDefinition:
     key: PersistenceKey
@@ -185,15 +379,92 @@ def get_persisted_value(def_instance: dict, property_id: int, property_type: str
     return to_native(found_prop[prop_name])
 
 
-def set_persisted_value(def_instance: dict, property_id: int, property_type: str, value):
+def set_persisted_value(
+    def_instance: dict, property_id: int, property_type: str, value, journal: typing.Optional[EditJournal] = None
+):
+    """Set a property's value, the change is recorded in journal (if given)."""
     prop_name = f",{property_id}:{property_type}"
 
     all_props = def_instance["PropertyValueData"]["DefinitionProperties"]
     for prop in all_props:
         if prop_name in prop:
-            prop[prop_name] = PROPERTY_TYPES[property_type](value)
+            if journal is None:
+                prop[prop_name] = PROPERTY_TYPES[property_type](value)
+            else:
+                journal.set(prop, prop_name, PROPERTY_TYPES[property_type](value))
             return
-    all_props.append({prop_name: PROPERTY_TYPES[property_type](value)})
+    new_prop = {prop_name: PROPERTY_TYPES[property_type](value)}
+    if journal is None:
+        all_props.append(new_prop)
+    else:
+        journal.append(all_props, new_prop)
+
+
+def get_persisted_values(def_instance: dict, properties: typing.Iterable[typing.Tuple[int, str, object]]) -> list:
+    """Batch version of get_persisted_value() that scans the instance's properties only once.
+
+    properties contains (property_id, property_type, default_value) tuples, the returned list
+    has the values in the same order.
+    """
+    # Like get_persisted_value() the last matching property wins
+    found_props = {}
+    for prop in def_instance["PropertyValueData"]["DefinitionProperties"]:
+        for prop_name in prop:
+            found_props[prop_name] = prop
+
+    values = []
+    for property_id, property_type, default_value in properties:
+        prop_name = f",{property_id}:{property_type}"
+        found_prop = found_props.get(prop_name)
+        if found_prop is None:
+            values.append(default_value)
+        else:
+            values.append(to_native(found_prop[prop_name]))
+    return values
+
+
+def set_persisted_values(
+    def_instance: dict,
+    values: typing.Iterable[typing.Tuple[int, str, object]],
+    journal: typing.Optional[EditJournal] = None,
+):
+    """Batch version of set_persisted_value() that scans the instance's properties only once.
+
+    values contains (property_id, property_type, value) tuples.
+    All changes are recorded as a single step in journal (if given).
+    """
+    if journal is not None:
+        with journal.group():
+            _set_persisted_values(def_instance, values, journal)
+    else:
+        _set_persisted_values(def_instance, values, None)
+
+
+def _set_persisted_values(
+    def_instance: dict, values: typing.Iterable[typing.Tuple[int, str, object]], journal: typing.Optional[EditJournal]
+):
+    all_props = def_instance["PropertyValueData"]["DefinitionProperties"]
+
+    # Like set_persisted_value() the first matching property wins
+    found_props = {}
+    for prop in all_props:
+        for prop_name in prop:
+            found_props.setdefault(prop_name, prop)
+
+    for property_id, property_type, value in values:
+        prop_name = f",{property_id}:{property_type}"
+        found_prop = found_props.get(prop_name)
+        if found_prop is None:
+            found_prop = {}
+            if journal is None:
+                all_props.append(found_prop)
+            else:
+                journal.append(all_props, found_prop)
+            found_props[prop_name] = found_prop
+        if journal is None:
+            found_prop[prop_name] = PROPERTY_TYPES[property_type](value)
+        else:
+            journal.set(found_prop, prop_name, PROPERTY_TYPES[property_type](value))
 
 
 def get_or_create_persisted_value(def_instance: dict, property_id: int, property_type: str, default_value):
@@ -0,0 +1,142 @@
+# bw-save-game - BioWare save game tools
+# Copyright (C) 2024 Tim Niederhausen
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Website: https://github.com/timniederhausen/bw_save_game
+# -*- coding: utf-8 -*-
+import time
+import typing
+
+
+class StageStats(object):
+    """Accumulated numbers for one stage of the load / save pipeline."""
+
+    __slots__ = ("name", "calls", "seconds", "bytes_in", "bytes_out", "objects")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.objects = 0
+
+    def as_dict(self) -> dict:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+
+class _StageTimer(object):
+    __slots__ = ("_stats", "_start")
+
+    def __init__(self, stats: StageStats):
+        self._stats = stats
+        self._start = 0.0
+
+    def __enter__(self) -> StageStats:
+        self._start = time.perf_counter()
+        return self._stats
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stats.seconds += time.perf_counter() - self._start
+        self._stats.calls += 1
+        return False
+
+
+class PipelineStats(object):
+    """Per-stage timers, byte and object counts.
+
+    >>> stats = PipelineStats()
+    >>> with stats.stage("gunzip") as s:
+    ...     s.bytes_in += 10
+    >>> stats["gunzip"].bytes_in
+    10
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.stages = {}  # type: typing.Dict[str, StageStats]
+
+    def __getitem__(self, name: str) -> StageStats:
+        return self.stages[name]
+
+    def __contains__(self, name: str):
+        return name in self.stages
+
+    def stage(self, name: str) -> _StageTimer:
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats(name)
+        return _StageTimer(stats)
+
+    def total_seconds(self) -> float:
+        return sum(s.seconds for s in self.stages.values())
+
+    def as_dict(self) -> dict:
+        return {name: s.as_dict() for name, s in self.stages.items()}
+
+    def format_report(self) -> str:
+        row = "{:<24} {:>6} {:>10} {:>12} {:>12} {:>10}"
+        lines = [row.format("Stage", "Calls", "Time (ms)", "Bytes in", "Bytes out", "Objects")]
+        for s in self.stages.values():
+            lines.append(row.format(s.name, s.calls, f"{s.seconds * 1000:.2f}", s.bytes_in, s.bytes_out, s.objects))
+        lines.append(row.format("Total", "", f"{self.total_seconds() * 1000:.2f}", "", "", ""))
+        return "\n".join(lines)
+
+
+class _NullStageTimer(object):
+    __slots__ = ()
+
+    def __enter__(self) -> StageStats:
+        return _NULL_STAGE_STATS
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+class NullStats(object):
+    """Disabled PipelineStats: stage() costs about as much as an empty with block."""
+
+    enabled = False
+
+    def stage(self, name: str) -> _NullStageTimer:
+        return _NULL_STAGE_TIMER
+
+
+# Shared by all disabled stages, whatever gets counted here is never read
+_NULL_STAGE_STATS = StageStats("")
+_NULL_STAGE_TIMER = _NullStageTimer()
+NULL_STATS = NullStats()
+
+AnyStats = typing.Union[PipelineStats, NullStats]
+
+
+def get_stats(stats: typing.Optional[AnyStats]) -> AnyStats:
+    """Turn an optional stats argument into something stage() can always be called on."""
+    return NULL_STATS if stats is None else stats
+
+
+def count_objects(value) -> int:
+    """Count all objects (containers and values) in a decoded DbObject tree."""
+    count = 0
+    pending = [value]
+    while pending:
+        value = pending.pop()
+        count += 1
+        if isinstance(value, dict):
+            pending.extend(value.values())
+        elif isinstance(value, list):
+            pending.extend(value)
+    return count
@@ -0,0 +1,150 @@
+# bw-save-game - BioWare save game tools
+# Copyright (C) 2024 Tim Niederhausen
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Website: https://github.com/timniederhausen/bw_save_game
+# -*- coding: utf-8 -*-
+import re
+import typing
+from bisect import bisect_left
+from collections import OrderedDict
+
+# Patterns without any of these are plain substrings
+_REGEX_SPECIAL_CHARS = frozenset(".^$*+?{}[]\\|()")
+
+_NGRAM_SIZE = 3
+
+
+def _is_literal(pattern: str) -> bool:
+    return not any(c in _REGEX_SPECIAL_CHARS for c in pattern)
+
+
+class LabelIndex(object):
+    """Case-insensitive search index for a static list of labels.
+
+    search() accepts the same (regex) patterns as re.search(pattern, label, re.IGNORECASE).
+    Plain substrings are answered with a trigram index, "^prefix" patterns with a sorted table,
+    everything else falls back to matching the regex against all labels.
+    The index is built on first use.
+    """
+
+    def __init__(self, labels: typing.Sequence[str]):
+        self.labels = labels
+        self._lowered = None  # type: typing.Optional[typing.List[str]]
+        self._trigrams = None  # type: typing.Optional[typing.Dict[str, typing.List[int]]]
+        self._sorted = None  # type: typing.Optional[typing.List[typing.Tuple[str, int]]]
+        self._last_query = None  # type: typing.Optional[typing.Tuple[str, typing.FrozenSet[int]]]
+
+    def __len__(self):
+        return len(self.labels)
+
+    def _build(self):
+        lowered = [label.lower() for label in self.labels]
+        trigrams = {}  # type: typing.Dict[str, typing.List[int]]
+        for i, label in enumerate(lowered):
+            for gram in {label[j : j + _NGRAM_SIZE] for j in range(len(label) - _NGRAM_SIZE + 1)}:
+                postings = trigrams.get(gram)
+                if postings is None:
+                    trigrams[gram] = [i]
+                else:
+                    postings.append(i)
+        self._sorted = sorted((label, i) for i, label in enumerate(lowered))
+        self._trigrams = trigrams
+        self._lowered = lowered
+
+    def _search_substring(self, needle: str) -> typing.List[int]:
+        lowered = self._lowered
+        if len(needle) < _NGRAM_SIZE:
+            return [i for i, label in enumerate(lowered) if needle in label]
+
+        grams = {needle[j : j + _NGRAM_SIZE] for j in range(len(needle) - _NGRAM_SIZE + 1)}
+        postings = sorted((self._trigrams.get(gram, ()) for gram in grams), key=len)
+        candidates = set(postings[0])
+        for p in postings[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(p)
+        # Sharing all trigrams doesn't mean they're in the right order
+        return sorted(i for i in candidates if needle in lowered[i])
+
+    def _search_prefix(self, prefix: str) -> typing.List[int]:
+        result = []
+        entries = self._sorted
+        for k in range(bisect_left(entries, (prefix,)), len(entries)):
+            label, i = entries[k]
+            if not label.startswith(prefix):
+                break
+            result.append(i)
+        result.sort()
+        return result
+
+    def search(self, pattern: str) -> typing.List[int]:
+        """Return the (ascending) indices of all labels matching pattern.
+
+        Raises re.error for invalid patterns.
+        """
+        if not pattern:
+            return list(range(len(self.labels)))
+        if self._lowered is None:
+            self._build()
+
+        if _is_literal(pattern):
+            return self._search_substring(pattern.lower())
+        if pattern[0] == "^" and _is_literal(pattern[1:]):
+            return self._search_prefix(pattern[1:].lower())
+
+        compiled = re.compile(pattern, re.IGNORECASE)
+        return [i for i, label in enumerate(self.labels) if compiled.search(label)]
+
+    def matches(self, pattern: str) -> typing.FrozenSet[int]:
+        """Like search(), but returns a set and caches the result of the last query.
+
+        Useful when the same pattern is checked for many rows.
+        """
+        last_query = self._last_query
+        if last_query is not None and last_query[0] == pattern:
+            return last_query[1]
+        result = frozenset(self.search(pattern))
+        self._last_query = (pattern, result)
+        return result
+
+
+# Indices for the most recently used label lists (the same lists are usually searched every frame)
+_LABEL_INDEX_CACHE_SIZE = 8
+# Building an index isn't worth it for short lists
+_MIN_INDEXED_LABELS = 64
+
+_label_indices = OrderedDict()  # type: typing.OrderedDict[int, typing.Tuple[typing.Sequence[str], int, LabelIndex]]
+
+
+def get_label_index(labels: typing.Sequence[str]) -> LabelIndex:
+    """Return the (shared) index for a list of labels.
+
+    Only a few indices are kept around, and they're rebuilt when the length of their list changes.
+    Lists that are changed in-place need a LabelIndex of their own.
+    """
+    if len(labels) < _MIN_INDEXED_LABELS:
+        return LabelIndex(labels)
+
+    key = id(labels)
+    entry = _label_indices.get(key)
+    if entry is None or entry[0] is not labels or entry[1] != len(labels):
+        # Keep a reference to labels so its id() stays unique
+        entry = (labels, len(labels), LabelIndex(labels))
+        _label_indices[key] = entry
+        if len(_label_indices) > _LABEL_INDEX_CACHE_SIZE:
+            _label_indices.popitem(last=False)
+    _label_indices.move_to_end(key)
+    return entry[2]
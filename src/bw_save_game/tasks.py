@@ -0,0 +1,92 @@
+# bw-save-game - BioWare save game tools
+# Copyright (C) 2024 Tim Niederhausen
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Website: https://github.com/timniederhausen/bw_save_game
+# -*- coding: utf-8 -*-
+import threading
+import typing
+
+# on_progress(stage, fraction) callbacks are used to report the progress of long-running operations
+ProgressCallback = typing.Callable[[str, float], None]
+
+
+class OperationCancelled(Exception):
+    pass
+
+
+def report_progress(on_progress: typing.Optional[ProgressCallback], stage: str, fraction: float):
+    if on_progress is not None:
+        on_progress(stage, fraction)
+
+
+class BackgroundTask(object):
+    """Runs function(on_progress) on a worker thread.
+
+    The owner polls is_done() (e.g. once per frame) and then picks up result or error.
+    cancel() only sets a flag; the next progress report of the function raises OperationCancelled.
+    on_done() is called on the worker thread once the task is done (e.g. to wake up an idle UI).
+    """
+
+    def __init__(
+        self,
+        description: str,
+        function: typing.Callable[[ProgressCallback], typing.Any],
+        on_done: typing.Optional[typing.Callable[[], None]] = None,
+    ):
+        self.description = description
+        self.stage = ""
+        self.fraction = 0.0
+        self.result = None
+        self.error = None  # type: typing.Optional[BaseException]
+
+        self._function = function
+        self._on_done = on_done
+        self._cancel_requested = threading.Event()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"BackgroundTask({description})", daemon=True)
+
+    def start(self) -> "BackgroundTask":
+        self._thread.start()
+        return self
+
+    def _on_progress(self, stage: str, fraction: float):
+        if self._cancel_requested.is_set():
+            raise OperationCancelled(self.description)
+        self.stage = stage
+        self.fraction = fraction
+
+    def _run(self):
+        try:
+            self.result = self._function(self._on_progress)
+            self.fraction = 1.0
+        except BaseException as e:
+            self.error = e
+        finally:
+            self._done.set()
+            if self._on_done is not None:
+                self._on_done()
+
+    def cancel(self):
+        self._cancel_requested.set()
+
+    def is_cancelled(self) -> bool:
+        return isinstance(self.error, OperationCancelled)
+
+    def is_done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: typing.Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
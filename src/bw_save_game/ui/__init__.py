@@ -23,13 +23,17 @@ import os.path
 import re
 import sys
 import typing  # noqa: F401
+from contextlib import nullcontext
+from io import StringIO
 from uuid import UUID, uuid1
 
-from imgui_bundle import glfw_utils, imgui, immapp
+from imgui_bundle import glfw_utils, hello_imgui, imgui, immapp
 
 from bw_save_game import __version__
+from bw_save_game.atomic_file import atomic_open
 from bw_save_game.db_object import Long, to_native
 from bw_save_game.hash import frostbite_fnv1, frostbite_fnv1_lowercase
+from bw_save_game.journal import EditJournal
 from bw_save_game.persistence import (
     PersistenceKey,
     PersistencePropertyDefinition,
@@ -37,8 +41,15 @@ from bw_save_game.persistence import (
     registered_persistence_key,
     set_persisted_value,
 )
+from bw_save_game.search import get_label_index
+from bw_save_game.tasks import BackgroundTask, ProgressCallback, report_progress
 from bw_save_game.ui.config import as_sorted_feature_morphs
 from bw_save_game.ui.editors import (
+    edit_group,
+    get_edit_generation,
+    mark_edited,
+    set_edit_journal,
+    set_edited_value,
     show_bit_flags_editor,
     show_json_editor,
     show_labeled_bit_flags_editor,
@@ -53,6 +64,7 @@ from bw_save_game.ui.editors import (
     show_value_tree_editor_in_place,
 )
 from bw_save_game.ui.utils import (
+    RowValueCache,
     ask_for_file_to_open,
     ask_for_file_to_save,
     push_int_id,
@@ -113,8 +125,10 @@ from bw_save_game.veilguard import (
     FOLLOWER_LABELS,
     HARDING_AND_TASH_PROPERTIES,
     ITEM_ATTACHMENT_SLOT_NAMES,
+    ITEM_ID_TO_INDEX,
     KNOWN_CHARACTER_ARCHETYPE_LABELS,
     KNOWN_CHARACTER_ARCHETYPE_VALUES,
+    KNOWN_NAMES,
     LOOT_RARITY_NAMES,
     LUCANIS_AND_NEVE_PROPERTIES,
     LUCANIS_M21,
@@ -166,16 +180,21 @@ from bw_save_game.veilguard import (
     construct_item_attachment,
     deconstruct_item_attachment,
     force_complete_quest,
+    get_ParamDbKeyData_label,
+    get_ParamDbKeyData_labels,
     item_attachment_to_string,
-    parse_ParamDbKeyData,
 )
 
 # The UI needs some additional per-item data, pre-compute that here:
-_ITEM_ID_TO_INDEX = {item["id"]: i for i, item in enumerate(ALL_ITEMS)}
 _ITEM_KEYS = [item["key"] for item in ALL_ITEMS]
 
 WINDOW_TITLE = "DA:V Save Editor - By Tim & mons"
 
+# With power saving enabled, we only render this many frames per second without user input.
+# Has to be > 0 (hello_imgui treats 0 as "as fast as possible") and fast enough to pick up
+# delayed work like the debounced parsing of JSON editors (see editors._JSON_PARSE_DELAY).
+IDLE_FPS = 4.0
+
 
 def detect_save_game_path():
     if sys.platform.startswith("win"):
@@ -203,14 +222,22 @@ class State(object):
         self.add_item_object = None  # type: typing.Optional[dict]
         self.inventory_filter = ""
         self.inventory_filter_compiled = None  # type: typing.Optional[re.Pattern]
+        self.inventory_version = 0
+        self.inventory_filter_cache = None  # type: typing.Optional[typing.Tuple[tuple, typing.List[int]]]
+        self.persistence_values = RowValueCache()
         self.selected_collectible_set_index = 0
         self.selected_definition_index = 0
         self.selected_instance_index = 0
         self.hash_input = ""
+        self.power_saving = True
         self.temporary_select_all = False
 
         self.default_save_path = detect_save_game_path()
 
+        # active background operation (loading, saving, ...)
+        self.task = None  # type: typing.Optional[BackgroundTask]
+        self.task_callbacks = None  # type: typing.Optional[typing.Tuple[typing.Callable, str]]
+
         # loaded save game
         self.active_filename = None  # type: typing.Optional[str]
         self.save_game = None  # type: typing.Optional[VeilguardSaveGame]
@@ -218,62 +245,140 @@ class State(object):
     def has_content(self):
         return self.save_game is not None
 
+    def start_task(
+        self,
+        description: str,
+        function: typing.Callable[[ProgressCallback], typing.Any],
+        on_success: typing.Callable[[typing.Any], None],
+        error_message: str,
+    ):
+        """Run function on a worker thread, on_success() is called with its result by poll_task()."""
+        if self.task is not None:
+            return False
+        self.task = BackgroundTask(description, function, wake_up_ui).start()
+        self.task_callbacks = (on_success, error_message)
+        return True
+
+    def is_busy(self):
+        return self.task is not None
+
+    def poll_task(self):
+        """Finish the active task if it's done - must be called from the UI thread."""
+        task = self.task
+        if task is None or not task.is_done():
+            return
+
+        on_success, error_message = self.task_callbacks
+        self.task = None
+        self.task_callbacks = None
+        if task.error is None:
+            on_success(task.result)
+        elif not task.is_cancelled():
+            show_error(f"{error_message}: {repr(task.error)}")
+
     def load(self, filename: str):
-        try:
+        def load_save_game(on_progress):
             with open(filename, "rb") as f:
-                new_save_game = VeilguardSaveGame.from_file(f)
-        except Exception as e:
-            show_error(f"Cannot load {filename}: {repr(e)}")
-            return False
+                return VeilguardSaveGame.from_file(f, on_progress)
 
-        self.close()
-        self.active_filename = filename
-        self.save_game = new_save_game
-        return True
+        def on_loaded(new_save_game):
+            self.close()
+            self.active_filename = filename
+            self.set_save_game(new_save_game)
+            set_window_title(f"{WINDOW_TITLE}: {filename}")
+
+        return self.start_task(f"Loading {filename}", load_save_game, on_loaded, f"Cannot load {filename}")
 
     def save(self, filename: str):
         if not os.path.splitext(filename)[1]:
             filename += ".csav"
-        try:
-            with open(filename, "wb") as f:
-                self.save_game.to_file(f)
-        except Exception as e:
-            show_error(f"Cannot save {filename}: {repr(e)}")
-            return
-        self.active_filename = filename
+        save_game = self.save_game
+
+        def save_save_game(on_progress):
+            # Encodes everything before touching the file, so cancelling never leaves a partial file behind either
+            save_game.to_file(filename, on_progress, atomic=True)
+
+        def on_saved(_):
+            self.active_filename = filename
+            set_window_title(f"{WINDOW_TITLE}: {filename}")
+
+        return self.start_task(f"Saving {filename}", save_save_game, on_saved, f"Cannot save {filename}")
 
     def import_json(self, filename: str):
-        try:
+        def import_save_game(on_progress):
             with open(filename, "r", encoding="utf-8") as f:
-                new_save_game = VeilguardSaveGame.from_json(f)
-        except Exception as e:
-            show_error(f"Cannot load {filename}: {repr(e)}")
-            return
+                return VeilguardSaveGame.from_json(f, on_progress)
+
+        def on_imported(new_save_game):
+            self.close()
+            self.set_save_game(new_save_game)
+            set_window_title(WINDOW_TITLE)
 
-        self.close()
-        self.save_game = new_save_game
+        return self.start_task(f"Importing {filename}", import_save_game, on_imported, f"Cannot load {filename}")
 
     def export_json(self, filename: str):
         if not os.path.splitext(filename)[1]:
             filename += ".json"
-        try:
-            with open(filename, "w", encoding="utf-8") as f:
-                self.save_game.to_json(f)
-        except Exception as e:
-            show_error(f"Cannot save {filename}: {repr(e)}")
-            return
+        save_game = self.save_game
+
+        def export_save_game(on_progress):
+            buffer = StringIO()
+            save_game.to_json(buffer, on_progress)
+            report_progress(on_progress, "Writing", 0.9)
+            with atomic_open(filename, "w", encoding="utf-8") as f:
+                f.write(buffer.getvalue())
+
+        return self.start_task(f"Exporting {filename}", export_save_game, lambda _: None, f"Cannot save {filename}")
+
+    def mark_inventory_changed(self):
+        # Invalidates cached data derived from the inventory (e.g. filter results)
+        self.inventory_version += 1
+
+    def set_save_game(self, save_game: VeilguardSaveGame):
+        save_game.journal = EditJournal()
+        set_edit_journal(save_game.journal)
+        self.save_game = save_game
+
+    def undo(self):
+        if self.save_game is not None and self.save_game.journal.undo():
+            self.on_journal_changed()
+
+    def redo(self):
+        if self.save_game is not None and self.save_game.journal.redo():
+            self.on_journal_changed()
+
+    def on_journal_changed(self):
+        # Undo / redo can change anything, so all cached data is invalid now
+        self.save_game.mark_persistence_changed()
+        self.mark_inventory_changed()
+        mark_edited()
 
     def close(self):
         self.active_filename = None
         self.save_game = None
+        set_edit_journal(None)
         self.inventory_filter = ""
         self.inventory_filter_compiled = None
+        self.inventory_filter_cache = None
+        self.persistence_values.clear()
         self.selected_collectible_set_index = 0
         self.selected_definition_index = 0
         self.selected_instance_index = 0
         self.temporary_select_all = False
 
 
+def wake_up_ui():
+    # Thread-safe: makes the main loop render a frame even if it's idling
+    glfw_utils.glfw.post_empty_event()
+
+
+def update_idling(state: State):
+    fps_idling = hello_imgui.get_runner_params().fps_idling
+    # We need to keep rendering while a task is running to show its progress
+    fps_idling.enable_idling = state.power_saving and not state.is_busy()
+    fps_idling.fps_idle = IDLE_FPS
+
+
 def set_window_title(title: str):
     glfw_win = glfw_utils.glfw_window_hello_imgui()
     glfw_utils.glfw.set_window_title(glfw_win, title)
@@ -286,8 +391,7 @@ DRAGON_AGE_JSON_WILDCARD = "JSON save document (*.json)|*.json"
 def ask_for_open(state: State):
     path = ask_for_file_to_open("Open Save Game", DRAGON_AGE_CSAV_WILDCARD, state.default_save_path)
     if path:
-        if state.load(path):
-            set_window_title(f"{WINDOW_TITLE}: {path}")
+        state.load(path)
 
 
 def show_app_about(state: State):
@@ -309,7 +413,7 @@ def show_app_about(state: State):
 
 def show_hash_popup(state: State):
     imgui.set_next_window_pos(imgui.get_main_viewport().get_center(), imgui.Cond_.appearing, (0.5, 0.5))
-    imgui.set_next_window_size((500, 120))
+    imgui.set_next_window_size((500, 140))
     if imgui.begin_popup("Frostbite Hashes"):
         imgui.text_disabled("Input:")
         imgui.set_next_item_width(-1)
@@ -335,6 +439,15 @@ def show_hash_popup(state: State):
             flags=imgui.InputTextFlags_.read_only | imgui.InputTextFlags_.no_undo_redo,
         )
 
+        # Also allow going the other way if we've seen the name before
+        try:
+            known_name = KNOWN_NAMES.get(int(state.hash_input, 0))
+        except ValueError:
+            known_name = None
+        imgui.text_disabled("Known name:")
+        imgui.same_line()
+        imgui.text(known_name or "-")
+
         imgui.end_popup()
 
 
@@ -370,7 +483,6 @@ def show_main_menu_bar(state: State):
             path = ask_for_file_to_save("Write Save Game", DRAGON_AGE_CSAV_WILDCARD)
             if path:
                 state.save(path)
-                set_window_title(path)
 
         clicked, selected = imgui.menu_item(
             label="Export JSON", shortcut="", p_selected=False, enabled=state.has_content()
@@ -391,6 +503,26 @@ def show_main_menu_bar(state: State):
 
         imgui.end_menu()
 
+    if imgui.begin_menu("Edit", True):
+        can_undo = state.has_content() and state.save_game.journal.can_undo()
+        clicked, selected = imgui.menu_item(label="Undo", shortcut="Ctrl+Z", p_selected=False, enabled=can_undo)
+        if clicked:
+            state.undo()
+        can_redo = state.has_content() and state.save_game.journal.can_redo()
+        clicked, selected = imgui.menu_item(label="Redo", shortcut="Ctrl+Y", p_selected=False, enabled=can_redo)
+        if clicked:
+            state.redo()
+        imgui.end_menu()
+
+    if imgui.begin_menu("View", True):
+        clicked, selected = imgui.menu_item(label="Power saving", shortcut="", p_selected=state.power_saving)
+        if clicked:
+            state.power_saving = selected
+        if imgui.begin_item_tooltip():
+            imgui.text("Only redraw the window after input (saves CPU time)")
+            imgui.end_tooltip()
+        imgui.end_menu()
+
     if imgui.begin_menu("Tools", True):
         clicked, selected = imgui.menu_item(label="Frostbite String Hashes", shortcut="", p_selected=False)
         if clicked:
@@ -411,27 +543,44 @@ def show_main_menu_bar(state: State):
         imgui.open_popup("About")
 
     # shortcuts
-    if imgui.is_key_chord_pressed(imgui.Key.mod_ctrl.value | imgui.Key.o.value):
-        ask_for_open(state)
-    if state.active_filename and imgui.is_key_chord_pressed(imgui.Key.mod_ctrl.value | imgui.Key.s.value):
-        state.save(state.active_filename)
+    if not state.is_busy():
+        if imgui.is_key_chord_pressed(imgui.Key.mod_ctrl.value | imgui.Key.o.value):
+            ask_for_open(state)
+        if state.active_filename and imgui.is_key_chord_pressed(imgui.Key.mod_ctrl.value | imgui.Key.s.value):
+            state.save(state.active_filename)
+        # Text inputs have their own undo / redo
+        if state.has_content() and not imgui.get_io().want_text_input:
+            if imgui.is_key_chord_pressed(imgui.Key.mod_ctrl.value | imgui.Key.z.value):
+                state.undo()
+            if imgui.is_key_chord_pressed(imgui.Key.mod_ctrl.value | imgui.Key.y.value):
+                state.redo()
     if imgui.is_key_chord_pressed(imgui.Key.mod_ctrl.value | imgui.Key.q.value):
         sys.exit(0)
 
 
-def show_item_id_editor(obj):
+def _set_item_value(item: dict, key: str, value, journal: typing.Optional[EditJournal]):
+    # Items that aren't part of the save yet (e.g. "Add Item") don't need undo
+    if journal is None:
+        item[key] = value
+    else:
+        journal.set(item, key, value)
+        mark_edited()
+
+
+def show_item_id_editor(obj, journal: typing.Optional[EditJournal] = None):
     # https://github.com/ocornut/imgui/issues/623
     imgui.set_next_item_width(-1)
 
-    index = _ITEM_ID_TO_INDEX.get(to_native(obj["itemDataId"]))
+    index = ITEM_ID_TO_INDEX.get(to_native(obj["itemDataId"]))
     if index is not None:
         # https://github.com/ocornut/imgui/issues/623
         changed, new_index = show_searchable_combo_box("##itemDataId", _ITEM_KEYS, index)
         if changed:
             data = ALL_ITEMS[new_index]
-            obj["itemDataId"] = Long(data["id"])
-            obj["dataGuid"] = data["guid"]
-        return
+            with nullcontext() if journal is None else journal.group():
+                _set_item_value(obj, "itemDataId", Long(data["id"]), journal)
+                _set_item_value(obj, "dataGuid", data["guid"], journal)
+        return changed
 
     preview_value = f"Unsupported item: {to_native(obj['itemDataId'])}"
 
@@ -440,10 +589,11 @@ def show_item_id_editor(obj):
         if imgui.begin_item_tooltip():
             imgui.text(preview_value)
             imgui.end_tooltip()
-        return
+        return False
 
     # TODO: Show something better!
     # show_simple_value_editor(obj, "itemDataId")
+    return False
 
 
 def show_persisted_value_editor(state: State, label: str, prop: PersistencePropertyDefinition):
@@ -471,23 +621,31 @@ def show_persisted_value_options_editor(
     if changed:
         state.save_game.set_persistence_property(prop, new_value)
     imgui.pop_id()
+    return changed
 
 
-def show_editor_raw_data(game: VeilguardSaveGame):
+def show_editor_raw_data(state: State):
+    game = state.save_game
+    changed = False
     if imgui.collapsing_header("Metadata", imgui.TreeNodeFlags_.default_open | imgui.TreeNodeFlags_.allow_overlap):
         for key in game.meta:
             imgui.push_id(key)
-            show_value_tree_editor_in_place(game.meta, key)
+            changed |= show_value_tree_editor_in_place(game.meta, key)
             imgui.pop_id()
     imgui.separator()
     if imgui.collapsing_header("Content", imgui.TreeNodeFlags_.default_open | imgui.TreeNodeFlags_.allow_overlap):
         for key in game.data:
             imgui.push_id(key)
-            show_value_tree_editor_in_place(game.data, key)
+            changed |= show_value_tree_editor_in_place(game.data, key)
             imgui.pop_id()
 
+    if changed:
+        # We don't know what was edited, so the cached persistence / inventory data might be stale
+        game.mark_persistence_changed()
+        state.mark_inventory_changed()
+
 
-def show_item_attachment_editor(item: dict):
+def show_item_attachment_editor(item: dict, journal: typing.Optional[EditJournal] = None):
     preview_value = item_attachment_to_string(item)
 
     # https://github.com/ocornut/imgui/issues/623
@@ -499,23 +657,26 @@ def show_item_attachment_editor(item: dict):
             imgui.end_tooltip()
 
         imgui.pop_item_width()
-        return
+        return False
 
-    typ, parent, attach_slot = deconstruct_item_attachment(item)
+    old_attachment = deconstruct_item_attachment(item)
+    typ, parent, attach_slot = old_attachment
 
     if imgui.radio_button("None", typ == ItemAttachmentType.None_):
-        construct_item_attachment(item, ItemAttachmentType.None_)
+        construct_item_attachment(item, ItemAttachmentType.None_, journal=journal)
     imgui.same_line()
     if imgui.radio_button("Character", typ == ItemAttachmentType.Character):
-        construct_item_attachment(item, ItemAttachmentType.Character, KNOWN_CHARACTER_ARCHETYPE_VALUES[0], attach_slot)
+        construct_item_attachment(
+            item, ItemAttachmentType.Character, KNOWN_CHARACTER_ARCHETYPE_VALUES[0], attach_slot, journal
+        )
     imgui.same_line()
     if imgui.radio_button("ItemGuid", typ == ItemAttachmentType.ItemGuid):
-        construct_item_attachment(item, ItemAttachmentType.ItemGuid, UUID(int=0), attach_slot)
+        construct_item_attachment(item, ItemAttachmentType.ItemGuid, UUID(int=0), attach_slot, journal)
 
     if typ == ItemAttachmentType.None_:
         imgui.end_combo()
         imgui.pop_item_width()
-        return
+        return deconstruct_item_attachment(item) != old_attachment
 
     # https://github.com/ocornut/imgui/issues/623
     imgui.push_item_width(-1)
@@ -527,7 +688,7 @@ def show_item_attachment_editor(item: dict):
             changed, new_item = imgui.list_box("##Character", current_item, KNOWN_CHARACTER_ARCHETYPE_LABELS)
             if changed:
                 construct_item_attachment(
-                    item, ItemAttachmentType.Character, KNOWN_CHARACTER_ARCHETYPE_VALUES[new_item], attach_slot
+                    item, ItemAttachmentType.Character, KNOWN_CHARACTER_ARCHETYPE_VALUES[new_item], attach_slot, journal
                 )
         except ValueError:
             imgui.text_colored((1.0, 0.0, 0.0, 1.0), f"Unknown archetype {parent}")
@@ -535,23 +696,24 @@ def show_item_attachment_editor(item: dict):
         imgui.text("Item UUID:")
         changed, new_value = show_uuid_editor("##ItemGuid", parent)
         if changed:
-            construct_item_attachment(item, ItemAttachmentType.ItemGuid, new_value, attach_slot)
+            construct_item_attachment(item, ItemAttachmentType.ItemGuid, new_value, attach_slot, journal)
 
     try:
         current_item = ITEM_ATTACHMENT_SLOT_NAMES.index(attach_slot or "None")
         imgui.text("Attach slot:")
         changed, new_item = imgui.list_box("##AttachSlot", current_item, ITEM_ATTACHMENT_SLOT_NAMES)
         if changed:
-            construct_item_attachment(item, typ, parent, ITEM_ATTACHMENT_SLOT_NAMES[new_item])
+            construct_item_attachment(item, typ, parent, ITEM_ATTACHMENT_SLOT_NAMES[new_item], journal)
     except ValueError:
         imgui.text_colored((1.0, 0.0, 0.0, 1.0), f"Unknown attach slot {attach_slot}")
 
     imgui.pop_item_width()
     imgui.end_combo()
     imgui.pop_item_width()
+    return deconstruct_item_attachment(item) != old_attachment
 
 
-def show_item_rarity_editor(item: dict):
+def show_item_rarity_editor(item: dict, journal: typing.Optional[EditJournal] = None):
     # https://github.com/ocornut/imgui/issues/623
     imgui.push_item_width(-1)
 
@@ -560,14 +722,14 @@ def show_item_rarity_editor(item: dict):
         current_item = LOOT_RARITY_NAMES.index(rarity or "Rarity_None")
         changed, new_item = imgui.combo("##Rarity", current_item, LOOT_RARITY_NAMES)
         if changed:
-            item["rarity"] = LOOT_RARITY_NAMES[new_item]
+            _set_item_value(item, "rarity", LOOT_RARITY_NAMES[new_item], journal)
     except ValueError:
         imgui.text_colored((1.0, 0.0, 0.0, 1.0), f"Unknown: {rarity}")
 
     imgui.pop_item_width()
 
 
-def show_item_stack_count_editor(item: dict):
+def show_item_stack_count_editor(item: dict, journal: typing.Optional[EditJournal] = None):
     # https://github.com/ocornut/imgui/issues/623
     imgui.push_item_width(-1)
 
@@ -575,30 +737,45 @@ def show_item_stack_count_editor(item: dict):
     count = to_native(item.get("stackCount", 1))
     changed, new_count = imgui.input_int("##StackCount", count)
     if changed:
-        item["stackCount"] = new_count
+        _set_item_value(item, "stackCount", new_count, journal)
         removed = new_count == 0
 
     imgui.pop_item_width()
     return removed
 
 
-def show_item_level_editor(item: dict):
+def show_item_level_editor(item: dict, journal: typing.Optional[EditJournal] = None):
     # https://github.com/ocornut/imgui/issues/623
     imgui.push_item_width(-1)
 
     level = to_native(item.get("level", 1))
     changed, new_level = imgui.input_int("##Level", level)
     if changed:
-        item["level"] = new_level
+        _set_item_value(item, "level", new_level, journal)
 
     imgui.pop_item_width()
 
 
+def _get_filtered_item_indices(state: State, items: list) -> typing.List[int]:
+    # Filtering is expensive for large inventories, so we only do it when the filter or the items changed
+    key = (state.inventory_filter, id(items), len(items), state.inventory_version)
+    cache = state.inventory_filter_cache
+    if cache is not None and cache[0] == key:
+        return cache[1]
+
+    if state.inventory_filter:
+        pattern = state.inventory_filter_compiled
+        indices = [i for i, item in enumerate(items) if _does_item_match(item, pattern)]
+    else:
+        indices = list(range(len(items)))
+    state.inventory_filter_cache = (key, indices)
+    return indices
+
+
 def _does_item_match(item, pattern: re.Pattern):
-    item_def_index = _ITEM_ID_TO_INDEX.get(to_native(item["itemDataId"]))
+    item_def_index = ITEM_ID_TO_INDEX.get(to_native(item["itemDataId"]))
     if item_def_index is not None:
-        item_def = ALL_ITEMS[item_def_index]
-        if pattern.search(item_def["key"]):
+        if item_def_index in get_label_index(_ITEM_KEYS).matches(pattern.pattern):
             return True
 
     typ, parent, attach_slot = deconstruct_item_attachment(item)
@@ -656,7 +833,9 @@ def show_editor_inventories(state: State):
         show_item_level_editor(item)
 
         if imgui.button("OK", (120, 0)):
-            items.append(item)
+            state.save_game.journal.append(items, item)
+            state.mark_inventory_changed()
+            mark_edited()
             imgui.close_current_popup()
         imgui.set_item_default_focus()
         imgui.same_line()
@@ -672,11 +851,8 @@ def show_editor_inventories(state: State):
         state.inventory_filter = new_value
         state.inventory_filter_compiled = new_value_compiled
 
-    filtered_items = enumerate(items)
-    if state.inventory_filter:
-        filtered_items = filter(
-            lambda i_item: _does_item_match(i_item[1], state.inventory_filter_compiled), filtered_items
-        )
+    filtered_items = _get_filtered_item_indices(state, items)
+    journal = state.save_game.journal
 
     removed_items = []
     if imgui.begin_table("Items", 5, imgui.TableFlags_.resizable | imgui.TableFlags_.borders):
@@ -686,28 +862,40 @@ def show_editor_inventories(state: State):
         imgui.table_setup_column("Rarity")
         imgui.table_setup_column("Level")
         imgui.table_headers_row()
-        for i, item in filtered_items:
-            imgui.push_id(i)
-            imgui.table_next_row()
-            imgui.table_next_column()
-            show_item_id_editor(item)
-            imgui.table_next_column()
-            show_item_attachment_editor(item)
-            imgui.table_next_column()
-            if show_item_stack_count_editor(item):
-                removed_items.append(i)
-            imgui.table_next_column()
-            show_item_rarity_editor(item)
-            imgui.table_next_column()
-            show_item_level_editor(item)
-            imgui.pop_id()
+
+        # Only submit the visible rows (the row height is measured from the first row)
+        clipper = imgui.ListClipper()
+        clipper.begin(len(filtered_items))
+        while clipper.step():
+            for row in range(clipper.display_start, clipper.display_end):
+                i = filtered_items[row]
+                item = items[i]
+                imgui.push_id(i)
+                imgui.table_next_row()
+                imgui.table_next_column()
+                if show_item_id_editor(item, journal):
+                    state.mark_inventory_changed()
+                imgui.table_next_column()
+                if show_item_attachment_editor(item, journal):
+                    state.mark_inventory_changed()
+                imgui.table_next_column()
+                if show_item_stack_count_editor(item, journal):
+                    removed_items.append(i)
+                imgui.table_next_column()
+                show_item_rarity_editor(item, journal)
+                imgui.table_next_column()
+                show_item_level_editor(item, journal)
+                imgui.pop_id()
         imgui.end_table()
 
     # Actually remove the items from our list - in reverse order of index
     if removed_items:
         removed_items = sorted(removed_items, reverse=True)
-        for i in removed_items:
-            del items[i]
+        with journal.group():
+            for i in removed_items:
+                journal.delete(items, i)
+        state.mark_inventory_changed()
+        mark_edited()
 
 
 def show_currency_editor(state: State):
@@ -719,6 +907,7 @@ def show_currency_editor(state: State):
     imgui.table_setup_column("Amount")
     imgui.table_headers_row()
     currencies, discovered_currencies = state.save_game.get_currencies()
+    journal = state.save_game.journal
     for currency_def in ALL_CURRENCIES:
         imgui.push_id(currency_def["id"])
         imgui.table_next_row()
@@ -728,9 +917,10 @@ def show_currency_editor(state: State):
         changed, new_value = imgui.checkbox("##discovered?", currency_def["id"] in discovered_currencies)
         if changed:
             if new_value:
-                discovered_currencies.append(currency_def["id"])
+                journal.append(discovered_currencies, currency_def["id"])
             else:
-                discovered_currencies.remove(currency_def["id"])
+                journal.delete(discovered_currencies, discovered_currencies.index(currency_def["id"]))
+            mark_edited()
         imgui.table_next_column()
         obj = next((c for c in currencies if c["currency"] == currency_def["id"]), None)
         if obj is None:
@@ -738,7 +928,8 @@ def show_currency_editor(state: State):
             changed, new_value = show_value_editor(0)
             imgui.pop_id()
             if changed:
-                currencies.append(dict(currency=currency_def["id"], value=new_value))
+                journal.append(currencies, dict(currency=currency_def["id"], value=new_value))
+                mark_edited()
         else:
             show_value_editor_in_place(obj, "value")
         imgui.pop_id()
@@ -759,53 +950,59 @@ def show_editor_main(state: State):
                 TRANSITION_START_POINTS,
                 TRANSITION_START_POINTS,
             )
-            if show_labeled_value_editor_in_place("Career ID", state.save_game.meta, "activecareer"):
-                difficulty = state.save_game.get_client_difficulty()
-                difficulty["careerId"] = state.save_game.meta["activecareer"]
+            with state.save_game.edit_group():
+                if show_labeled_value_editor_in_place("Career ID", state.save_game.meta, "activecareer"):
+                    difficulty = state.save_game.get_client_difficulty()
+                    state.save_game.set_value(difficulty, "careerId", state.save_game.meta["activecareer"])
 
         if imgui.collapsing_header(
             "Player character", imgui.TreeNodeFlags_.default_open | imgui.TreeNodeFlags_.allow_overlap
         ):
-            if show_labeled_value_editor_in_place("Name", state.save_game.meta["projdata"], "charname"):
-                state.save_game.get_client_rpg_extents(loadpass=0)["characterName"] = state.save_game.meta["projdata"][
-                    "charname"
-                ]
-                state.save_game.get_server_rpg_extents(loadpass=0)["characterName"] = state.save_game.meta["projdata"][
-                    "charname"
-                ]
-            if show_persisted_value_options_editor(
-                state,
-                "Lineage",
-                CHARACTER_GENERATOR_LINEAGE,
-                CHARACTER_GENERATOR_LINEAGE_VALUES,
-                CHARACTER_GENERATOR_LINEAGE_LABELS,
-            ):
-                # value is duplicated!
-                state.save_game.meta["projdata"]["lineage"] = state.save_game.get_persistence_property(
-                    CHARACTER_GENERATOR_LINEAGE
-                )
-            if show_persisted_value_options_editor(
-                state,
-                "Faction",
-                CHARACTER_GENERATOR_FACTION,
-                CHARACTER_GENERATOR_FACTION_VALUES,
-                CHARACTER_GENERATOR_FACTION_LABELS,
-            ):
-                # value is duplicated!
-                state.save_game.meta["projdata"]["faction"] = state.save_game.get_persistence_property(
-                    CHARACTER_GENERATOR_FACTION
-                )
-            if show_labeled_options_editor_in_place(
-                "Class",
-                state.save_game.meta["projdata"],
-                "archetype",
-                KNOWN_CHARACTER_ARCHETYPE_VALUES,
-                KNOWN_CHARACTER_ARCHETYPE_LABELS,
-            ):
-                old_archetype = to_native(state.save_game.get_server_rpg_extents(loadpass=0)["archetype"])
-                state.save_game.replace_character_archetype(
-                    old_archetype, state.save_game.meta["projdata"]["archetype"]
-                )
+            with state.save_game.edit_group():
+                if show_labeled_value_editor_in_place("Name", state.save_game.meta["projdata"], "charname"):
+                    name = state.save_game.meta["projdata"]["charname"]
+                    state.save_game.set_value(state.save_game.get_client_rpg_extents(loadpass=0), "characterName", name)
+                    state.save_game.set_value(state.save_game.get_server_rpg_extents(loadpass=0), "characterName", name)
+            with state.save_game.edit_group():
+                if show_persisted_value_options_editor(
+                    state,
+                    "Lineage",
+                    CHARACTER_GENERATOR_LINEAGE,
+                    CHARACTER_GENERATOR_LINEAGE_VALUES,
+                    CHARACTER_GENERATOR_LINEAGE_LABELS,
+                ):
+                    # value is duplicated!
+                    state.save_game.set_value(
+                        state.save_game.meta["projdata"],
+                        "lineage",
+                        state.save_game.get_persistence_property(CHARACTER_GENERATOR_LINEAGE),
+                    )
+            with state.save_game.edit_group():
+                if show_persisted_value_options_editor(
+                    state,
+                    "Faction",
+                    CHARACTER_GENERATOR_FACTION,
+                    CHARACTER_GENERATOR_FACTION_VALUES,
+                    CHARACTER_GENERATOR_FACTION_LABELS,
+                ):
+                    # value is duplicated!
+                    state.save_game.set_value(
+                        state.save_game.meta["projdata"],
+                        "faction",
+                        state.save_game.get_persistence_property(CHARACTER_GENERATOR_FACTION),
+                    )
+            with state.save_game.edit_group():
+                if show_labeled_options_editor_in_place(
+                    "Class",
+                    state.save_game.meta["projdata"],
+                    "archetype",
+                    KNOWN_CHARACTER_ARCHETYPE_VALUES,
+                    KNOWN_CHARACTER_ARCHETYPE_LABELS,
+                ):
+                    old_archetype = to_native(state.save_game.get_server_rpg_extents(loadpass=0)["archetype"])
+                    state.save_game.replace_character_archetype(
+                        old_archetype, state.save_game.meta["projdata"]["archetype"]
+                    )
             show_labeled_options_editor_in_place(
                 "Class keybinding profile",
                 state.save_game.meta["projdata"],
@@ -813,54 +1010,67 @@ def show_editor_main(state: State):
                 CLASS_KEYBINDING_VALUES,
                 CLASS_KEYBINDING_LABELS,
             )
-            if show_persisted_value_editor(state, "Level:", PROGRESSION_CurrentLevel):
-                new_level = state.save_game.get_persistence_property(PROGRESSION_CurrentLevel)
-                if state.save_game.meta["projdata"]["level"] != new_level:
-                    state.save_game.change_level(new_level)
-            if show_persisted_value_options_editor(
-                state,
-                "Voice",
-                CHARACTER_GENERATOR_VOICE,
-                CHARACTER_GENERATOR_VOICE_VALUES,
-                CHARACTER_GENERATOR_VOICE_LABELS,
-            ):
-                # value is duplicated!
-                state.save_game.meta["projdata"]["voice"] = state.save_game.get_persistence_property(
-                    CHARACTER_GENERATOR_VOICE
-                )
-            if show_persisted_value_options_editor(
-                state,
-                "Voice tone",
-                CHARACTER_GENERATOR_VOICE_TONE,
-                CHARACTER_GENERATOR_VOICE_TONE_VALUES,
-                CHARACTER_GENERATOR_VOICE_TONE_LABELS,
-            ):
-                # value is duplicated!
-                state.save_game.meta["projdata"]["tone"] = state.save_game.get_persistence_property(
-                    CHARACTER_GENERATOR_VOICE_TONE
-                )
-            if show_persisted_value_options_editor(
-                state,
-                "Gender",
-                CHARACTER_GENERATOR_GENDER,
-                CHARACTER_GENDER_VALUES,
-                CHARACTER_GENDER_LABELS,
-            ):
-                # value is duplicated!
-                state.save_game.meta["projdata"]["gender"] = state.save_game.get_persistence_property(
-                    CHARACTER_GENERATOR_GENDER
-                )
-            if show_persisted_value_options_editor(
-                state,
-                "Pronouns",
-                CHARACTER_GENERATOR_PRONOUNS,
-                CHARACTER_GENERATOR_PRONOUN_OPTION_VALUES,
-                CHARACTER_GENERATOR_PRONOUN_OPTION_LABELS,
-            ):
-                # value is duplicated!
-                state.save_game.meta["projdata"]["pronoun"] = state.save_game.get_persistence_property(
-                    CHARACTER_GENERATOR_PRONOUNS
-                )
+            with state.save_game.edit_group():
+                if show_persisted_value_editor(state, "Level:", PROGRESSION_CurrentLevel):
+                    new_level = state.save_game.get_persistence_property(PROGRESSION_CurrentLevel)
+                    if state.save_game.meta["projdata"]["level"] != new_level:
+                        state.save_game.change_level(new_level)
+            with state.save_game.edit_group():
+                if show_persisted_value_options_editor(
+                    state,
+                    "Voice",
+                    CHARACTER_GENERATOR_VOICE,
+                    CHARACTER_GENERATOR_VOICE_VALUES,
+                    CHARACTER_GENERATOR_VOICE_LABELS,
+                ):
+                    # value is duplicated!
+                    state.save_game.set_value(
+                        state.save_game.meta["projdata"],
+                        "voice",
+                        state.save_game.get_persistence_property(CHARACTER_GENERATOR_VOICE),
+                    )
+            with state.save_game.edit_group():
+                if show_persisted_value_options_editor(
+                    state,
+                    "Voice tone",
+                    CHARACTER_GENERATOR_VOICE_TONE,
+                    CHARACTER_GENERATOR_VOICE_TONE_VALUES,
+                    CHARACTER_GENERATOR_VOICE_TONE_LABELS,
+                ):
+                    # value is duplicated!
+                    state.save_game.set_value(
+                        state.save_game.meta["projdata"],
+                        "tone",
+                        state.save_game.get_persistence_property(CHARACTER_GENERATOR_VOICE_TONE),
+                    )
+            with state.save_game.edit_group():
+                if show_persisted_value_options_editor(
+                    state,
+                    "Gender",
+                    CHARACTER_GENERATOR_GENDER,
+                    CHARACTER_GENDER_VALUES,
+                    CHARACTER_GENDER_LABELS,
+                ):
+                    # value is duplicated!
+                    state.save_game.set_value(
+                        state.save_game.meta["projdata"],
+                        "gender",
+                        state.save_game.get_persistence_property(CHARACTER_GENERATOR_GENDER),
+                    )
+            with state.save_game.edit_group():
+                if show_persisted_value_options_editor(
+                    state,
+                    "Pronouns",
+                    CHARACTER_GENERATOR_PRONOUNS,
+                    CHARACTER_GENERATOR_PRONOUN_OPTION_VALUES,
+                    CHARACTER_GENERATOR_PRONOUN_OPTION_LABELS,
+                ):
+                    # value is duplicated!
+                    state.save_game.set_value(
+                        state.save_game.meta["projdata"],
+                        "pronoun",
+                        state.save_game.get_persistence_property(CHARACTER_GENERATOR_PRONOUNS),
+                    )
             show_persisted_value_editor(state, "Is Trans?", CHARACTER_GENERATOR_IS_TRANS)
 
         if imgui.collapsing_header(
@@ -876,15 +1086,18 @@ def show_editor_main(state: State):
             "Difficulty", imgui.TreeNodeFlags_.default_open | imgui.TreeNodeFlags_.allow_overlap
         ):
             difficulty = state.save_game.get_client_difficulty()
-            if show_labeled_options_editor_in_place(
-                "Combat Difficulty",
-                difficulty,
-                "difficultyIndex",
-                DIFFICULTY_COMBAT_PRESET_VALUES,
-                DIFFICULTY_COMBAT_PRESET_LABELS,
-            ):
-                # value is duplicated!
-                state.save_game.meta["projdata"]["difficulty"] = difficulty["difficultyIndex"]
+            with state.save_game.edit_group():
+                if show_labeled_options_editor_in_place(
+                    "Combat Difficulty",
+                    difficulty,
+                    "difficultyIndex",
+                    DIFFICULTY_COMBAT_PRESET_VALUES,
+                    DIFFICULTY_COMBAT_PRESET_LABELS,
+                ):
+                    # value is duplicated!
+                    state.save_game.set_value(
+                        state.save_game.meta["projdata"], "difficulty", difficulty["difficultyIndex"]
+                    )
             show_labeled_options_editor_in_place(
                 "Exploration Difficulty",
                 difficulty,
@@ -980,7 +1193,7 @@ def show_editor_json_appearances(state: State):
         imgui.push_item_width(-1)
         changed, new_value = show_json_editor("##Player", data["playerData"], editor_size)
         if changed:
-            data["playerData"] = new_value
+            state.save_game.set_value(data, "playerData", new_value)
         imgui.pop_item_width()
 
     if imgui.collapsing_header(
@@ -990,7 +1203,7 @@ def show_editor_json_appearances(state: State):
         imgui.push_item_width(-1)
         changed, new_value = show_json_editor("##Inquisitor", data["inquisitorData"], editor_size)
         if changed:
-            data["inquisitorData"] = new_value
+            state.save_game.set_value(data, "inquisitorData", new_value)
         imgui.pop_item_width()
 
 
@@ -1014,8 +1227,9 @@ def show_item_choices_editor(value):
 
 def show_shader_texture_param_editor(value):
     show_labeled_value_editor_in_place("ParamName", value, "paramName")
-    if show_labeled_value_editor_in_place("TexturePath", value, "texturePath"):
-        value["textureNameHash"] = frostbite_fnv1_lowercase(value["texturePath"].encode("utf-8"))
+    with edit_group():
+        if show_labeled_value_editor_in_place("TexturePath", value, "texturePath"):
+            set_edited_value(value, "textureNameHash", frostbite_fnv1_lowercase(value["texturePath"].encode("utf-8")))
 
 
 def show_bwheadfeature_editor(value):
@@ -1051,14 +1265,15 @@ def show_editor_structured_appearances(state: State, key: str):
             for item2 in show_array_property_heading("BodyBaseTextures", item["bodyBaseTextures"]):
                 show_shader_texture_param_editor(item2)
         for item in show_array_custom_property_heading(
-            "ShaderVecsList", customHeadData["shaderVecsList"], lambda _, o: str(parse_ParamDbKeyData(o["name"]))
+            "ShaderVecsList", customHeadData["shaderVecsList"], lambda _, o: get_ParamDbKeyData_label(o["name"])
         ):
             vecs = item["values"]
             for i in range(len(vecs)):
                 show_labeled_value_editor_in_place(str(i), vecs, i)
         for shaderBoolsList in show_property_heading("ShaderBoolsList", customHeadData["shaderBoolsList"]):
-            for value in shaderBoolsList:
-                show_labeled_value_editor_in_place(str(parse_ParamDbKeyData(value["name"])), value, "value")
+            labels = get_ParamDbKeyData_labels([value["name"] for value in shaderBoolsList])
+            for label, value in zip(labels, shaderBoolsList):
+                show_labeled_value_editor_in_place(label, value, "value")
         for item in show_array_property_heading("AntGSIntList", customHeadData["antGSIntList"]):
             show_ant_game_state_editor(item)
         for item in show_array_property_heading("AntGSFloatList", customHeadData["antGSFloatList"]):
@@ -1070,7 +1285,7 @@ def show_editor_structured_appearances(state: State, key: str):
         ):
             show_item_choices_editor(item)
         for item in show_array_property_heading(
-            "FeatureMorphsList", as_sorted_feature_morphs(customHeadData["featureMorphsList"])
+            "FeatureMorphsList", as_sorted_feature_morphs(customHeadData["featureMorphsList"], get_edit_generation())
         ):
             show_bwheadfeature_editor(item)
 
@@ -1154,11 +1369,12 @@ def show_editor_skills(state: State, archetype: CharacterArchetype):
     changed, new_value = imgui.checkbox("Unlock/Lock all", state.temporary_select_all)
     if changed:
         state.temporary_select_all = new_value
-        for skill in SKILL_GRAPHS[graph_id]["skills"]:
-            unlock_property = PersistencePropertyDefinition(
-                persistence_key, skill["unlock_property_id"], "Boolean", False
-            )
-            state.save_game.set_persistence_property(unlock_property, new_value)
+        state.save_game.set_persistence_properties(
+            {
+                PersistencePropertyDefinition(persistence_key, skill["unlock_property_id"], "Boolean", False): new_value
+                for skill in SKILL_GRAPHS[graph_id]["skills"]
+            }
+        )
     imgui.columns(1)
 
     show_editor_skills_list(state, SKILL_GRAPHS[graph_id], persistence_key)
@@ -1268,14 +1484,18 @@ def show_editor_collectibles(state: State):
     imgui.text_disabled("Quick actions:")
     imgui.same_line()
     if imgui.button("Grant all appearances"):
+        flags_properties = []
         for collectibles_set in COLLECTIBLES:
             if collectibles_set["name"].startswith("CollectibleAppearanceParts"):
                 persistence_key = registered_persistence_key(collectibles_set["definition_id"])
                 for collectible in collectibles_set["collectibles"]:
-                    flags_property = PersistencePropertyDefinition(persistence_key, collectible["id"], "Uint8", 0)
-                    flags = state.save_game.get_persistence_property(flags_property) or 0
-                    flags |= CollectibleSetFlag.IsCollected
-                    state.save_game.set_persistence_property(flags_property, flags)
+                    flags_properties.append(
+                        PersistencePropertyDefinition(persistence_key, collectible["id"], "Uint8", 0)
+                    )
+        all_flags = state.save_game.get_persistence_properties(flags_properties)
+        state.save_game.set_persistence_properties(
+            {prop: (flags or 0) | CollectibleSetFlag.IsCollected for prop, flags in all_flags.items()}
+        )
 
     imgui.text_disabled("Collectibles Set:")
     imgui.same_line()
@@ -1295,19 +1515,31 @@ def show_editor_collectibles(state: State):
     imgui.table_setup_column("Collectible Name")
     imgui.table_setup_column("Is collected?")
     imgui.table_headers_row()
-    for collectible in collectibles_set["collectibles"]:
-        flags_property = PersistencePropertyDefinition(persistence_key, collectible["id"], "Uint8", 0)
-        flags = state.save_game.get_persistence_property(flags_property) or 0
 
-        push_int_id(collectible["id"])
-        imgui.table_next_row()
-        imgui.table_next_column()
-        imgui.text(collectible["name"])
-        imgui.table_next_column()
-        changed, new_value = show_bit_flags_editor(CollectibleSetFlag, flags)
-        if changed:
-            state.save_game.set_persistence_property(flags_property, new_value)
-        imgui.pop_id()
+    collectibles = collectibles_set["collectibles"]
+    values = state.persistence_values.get_values(
+        ("collectibles", state.selected_collectible_set_index, state.save_game.persistence_revision), len(collectibles)
+    )
+
+    clipper = imgui.ListClipper()
+    clipper.begin(len(collectibles))
+    while clipper.step():
+        for row in range(clipper.display_start, clipper.display_end):
+            collectible = collectibles[row]
+            flags_property = PersistencePropertyDefinition(persistence_key, collectible["id"], "Uint8", 0)
+            flags = values[row]
+            if flags is RowValueCache.NOT_CACHED:
+                flags = values[row] = state.save_game.get_persistence_property(flags_property) or 0
+
+            push_int_id(collectible["id"])
+            imgui.table_next_row()
+            imgui.table_next_column()
+            imgui.text(collectible["name"])
+            imgui.table_next_column()
+            changed, new_value = show_bit_flags_editor(CollectibleSetFlag, flags)
+            if changed:
+                state.save_game.set_persistence_property(flags_property, new_value)
+            imgui.pop_id()
 
     imgui.end_table()
 
@@ -1402,33 +1634,50 @@ def show_editor_persistence(state: State):
     imgui.table_setup_column("Property name")
     imgui.table_setup_column("Value")
     imgui.table_headers_row()
-    for property_info in persistence_definition["properties"]:
-        prop_id = property_info["id"]
-        prop_type = property_info["type"]
-        prop_default = property_info["default"]
 
-        push_int_id(prop_id)
+    properties = persistence_definition["properties"]
+    values = state.persistence_values.get_values(
+        ("persistence", def_id, id(persistence_instance), state.save_game.persistence_revision), len(properties)
+    )
 
-        imgui.table_next_row()
-        imgui.table_next_column()
-        imgui.text(property_info["name"])
-        imgui.table_next_column()
+    clipper = imgui.ListClipper()
+    clipper.begin(len(properties))
+    while clipper.step():
+        for row in range(clipper.display_start, clipper.display_end):
+            property_info = properties[row]
+            prop_id = property_info["id"]
+            prop_type = property_info["type"]
+            prop_default = property_info["default"]
 
-        value = prop_default
-        if persistence_instance is not None:
-            value = get_persisted_value(persistence_instance, prop_id, prop_type, prop_default)
+            push_int_id(prop_id)
 
-        if quest_info and property_info["name"] == "_QuestState":
-            changed, new_value = show_bit_flags_editor(EcoQuestRegisteredStateFlags, value)
-        else:
-            changed, new_value = show_value_editor(value)
+            imgui.table_next_row()
+            imgui.table_next_column()
+            imgui.text(property_info["name"])
+            imgui.table_next_column()
 
-        if changed:
-            if persistence_instance is None:
-                persistence_instance = state.save_game.make_persistence_instance(registered_persistence_key(def_id))
-            set_persisted_value(persistence_instance, prop_id, prop_type, new_value)
+            value = values[row]
+            if value is RowValueCache.NOT_CACHED:
+                value = prop_default
+                if persistence_instance is not None:
+                    value = get_persisted_value(persistence_instance, prop_id, prop_type, prop_default)
+                values[row] = value
 
-        imgui.pop_id()
+            if quest_info and property_info["name"] == "_QuestState":
+                changed, new_value = show_bit_flags_editor(EcoQuestRegisteredStateFlags, value)
+            else:
+                changed, new_value = show_value_editor(value)
+
+            if changed:
+                with state.save_game.edit_group():
+                    if persistence_instance is None:
+                        persistence_instance = state.save_game.make_persistence_instance(
+                            registered_persistence_key(def_id)
+                        )
+                    set_persisted_value(persistence_instance, prop_id, prop_type, new_value, state.save_game.journal)
+                state.save_game.mark_persistence_changed()
+
+            imgui.pop_id()
 
     imgui.end_table()
 
@@ -1481,7 +1730,7 @@ def show_editor_content(state: State):
         imgui.end_tab_item()
 
     if imgui.begin_tab_item("Raw Data")[0]:
-        show_editor_raw_data(state.save_game)
+        show_editor_raw_data(state)
         imgui.end_tab_item()
 
     imgui.end_tab_bar()
@@ -1524,10 +1773,30 @@ def show_editor_window(state: State):
     imgui.end()
 
 
+def show_task_progress(state: State):
+    state.poll_task()
+    task = state.task
+    if task is not None and not imgui.is_popup_open("Working"):
+        imgui.open_popup("Working")
+
+    imgui.set_next_window_pos(imgui.get_main_viewport().get_center(), imgui.Cond_.appearing, (0.5, 0.5))
+    if imgui.begin_popup_modal("Working", None, imgui.WindowFlags_.always_auto_resize)[0]:
+        if task is None:
+            imgui.close_current_popup()
+        else:
+            imgui.text(task.description)
+            imgui.progress_bar(task.fraction, (400, 0), task.stage or None)
+            if imgui.button("Cancel", (120, 0)):
+                task.cancel()
+        imgui.end_popup()
+
+
 def show_ui(state: State):
     show_main_menu_bar(state)
     show_app_about(state)
     show_hash_popup(state)
+    show_task_progress(state)
+    update_idling(state)
     show_editor_window(state)
 
     clear_unused_retained_data()
@@ -1536,8 +1805,12 @@ def show_ui(state: State):
 def main():
     state = State()
 
+    runner_params = hello_imgui.RunnerParams()
+    runner_params.callbacks.show_gui = lambda: show_ui(state)
     if len(sys.argv) > 1:
         filename = sys.argv[1]
-        state.load(filename)
-
-    immapp.run(gui_function=lambda: show_ui(state), window_title=WINDOW_TITLE)
+        # Loading wakes up the UI once it's done, so the window has to exist first
+        runner_params.callbacks.post_init = lambda: state.load(filename)
+    runner_params.app_window_params.window_title = WINDOW_TITLE
+    runner_params.fps_idling.fps_idle = IDLE_FPS
+    immapp.run(runner_params)
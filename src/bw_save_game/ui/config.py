@@ -16,6 +16,9 @@
 #
 # Website: https://github.com/timniederhausen/bw_save_game
 # -*- coding: utf-8 -*-
+import typing  # noqa: F401
+
+from bw_save_game.db_object import to_native
 
 # Modders requested a specific order that matches the order inside the EBX files
 FEATURE_MORPH_LIST_ORDER = [
@@ -199,13 +202,31 @@ FEATURE_MORPH_LIST_ORDER = [
 ]
 
 
+_FEATURE_MORPH_RANK = {name_hash: i for i, name_hash in enumerate(FEATURE_MORPH_LIST_ORDER)}
+_UNKNOWN_FEATURE_MORPH_RANK = 99999
+
+
 def _feature_morph_extract_key(morph: dict):
-    try:
-        return FEATURE_MORPH_LIST_ORDER.index(morph["nameHash"])
-    except ValueError:
-        return 99999
+    return _FEATURE_MORPH_RANK.get(to_native(morph["nameHash"]), _UNKNOWN_FEATURE_MORPH_RANK)
+
+
+# id(morphs) -> (morphs, len(morphs), version, sorted morphs)
+_sorted_feature_morphs_cache = {}  # type: typing.Dict[int, typing.Tuple[list, int, typing.Any, list]]
+_SORTED_FEATURE_MORPHS_CACHE_SIZE = 16
+
+
+def as_sorted_feature_morphs(morphs: list, version=None):
+    """Return morphs in FEATURE_MORPH_LIST_ORDER.
 
+    The result is cached until the list (or its length) changes. Callers that modify morphs in-place
+    have to pass a different version afterwards (e.g. ui.editors.get_edit_generation()).
+    """
+    entry = _sorted_feature_morphs_cache.get(id(morphs))
+    if entry is not None and entry[0] is morphs and entry[1] == len(morphs) and entry[2] == version:
+        return entry[3]
 
-# TODO: shouldn't be done every frame...
-def as_sorted_feature_morphs(morphs: list):
-    return sorted(morphs, key=_feature_morph_extract_key)
+    if len(_sorted_feature_morphs_cache) >= _SORTED_FEATURE_MORPHS_CACHE_SIZE:
+        _sorted_feature_morphs_cache.clear()
+    sorted_morphs = sorted(morphs, key=_feature_morph_extract_key)
+    _sorted_feature_morphs_cache[id(morphs)] = (morphs, len(morphs), version, sorted_morphs)
+    return sorted_morphs
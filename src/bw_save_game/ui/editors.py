@@ -18,6 +18,9 @@
 # -*- coding: utf-8 -*-
 import ctypes
 import json
+import time
+import typing  # noqa: F401
+from contextlib import nullcontext
 from uuid import UUID, uuid1
 
 from imgui_bundle import icons_fontawesome, imgui
@@ -30,6 +33,7 @@ from bw_save_game.db_object_codec import (
     int64_struct,
     uint64_struct,
 )
+from bw_save_game.journal import EditJournal
 from bw_save_game.ui.widgets import show_searchable_combo_box
 
 # imgui_bundle has automatically generated bindings that mishandle void*
@@ -47,17 +51,97 @@ def _wrap_bytes_for_imgui(buffer: bytearray):
     return PyCapsule_New(raw, _NANOBIND_VOIDP_CAPSULE_TYPE, PyCapsule_Destructor(0))
 
 
+# Incremented by all *_in_place() editors below: Anything derived from edited objects (e.g. their JSON text)
+# needs to be refreshed once this changes.
+_edit_generation = 0
+
+
+def mark_edited():
+    global _edit_generation
+    _edit_generation += 1
+
+
+def get_edit_generation() -> int:
+    return _edit_generation
+
+
+# If set, all edits made by the *_in_place() editors are recorded here
+_edit_journal = None  # type: typing.Optional[EditJournal]
+
+
+def set_edit_journal(journal: typing.Optional[EditJournal]):
+    global _edit_journal
+    _edit_journal = journal
+
+
+def set_edited_value(obj, key, value):
+    """obj[key] = value, recorded in the active edit journal"""
+    if _edit_journal is None:
+        obj[key] = value
+    else:
+        _edit_journal.set(obj, key, value)
+    mark_edited()
+
+
+def edit_group():
+    """Edits inside the with block become a single step in the active edit journal"""
+    if _edit_journal is None:
+        return nullcontext()
+    return _edit_journal.group()
+
+
+class JsonEditorState(object):
+    def __init__(self):
+        self.value = None
+        self.generation = -1
+        self.text = ""
+        self.modified_time = None  # type: typing.Optional[float]
+        self.error = None  # type: typing.Optional[str]
+
+
+# retained state, by label
+_json_editors = {}  # type: dict[str, JsonEditorState]
+
+# Only parse the text after the user stopped typing for this long (in seconds)
+_JSON_PARSE_DELAY = 0.3
+
+
 def show_json_editor(label: str, value, size=None):
-    changed, new_value = imgui.input_text_multiline(label, json.dumps(value, indent=2, default=to_raw_dict), size)
-    error = None
+    editor = _json_editors.get(label)
+    if editor is None:
+        editor = _json_editors[label] = JsonEditorState()
+
+    # Serializing the whole document is expensive, so only do it if it changed
+    if editor.value is not value or editor.generation != _edit_generation:
+        editor.value = value
+        editor.generation = _edit_generation
+        editor.text = json.dumps(value, indent=2, default=to_raw_dict)
+        editor.modified_time = None
+        editor.error = None
+
+    changed, new_text = imgui.input_text_multiline(label, editor.text, size)
     if changed:
+        editor.text = new_text
+        editor.modified_time = time.monotonic()
+
+    result = False, None
+    if editor.modified_time is not None and time.monotonic() - editor.modified_time >= _JSON_PARSE_DELAY:
+        editor.modified_time = None
         try:
-            return True, json.loads(new_value, object_hook=from_raw_dict)
+            new_value = json.loads(editor.text, object_hook=from_raw_dict)
         except ValueError as e:
-            error = repr(e)
-    if error is not None:
-        imgui.text_colored((0.9, 0.01, 0.01, 1.0), f"ERROR: {error}")
-    return False, None
+            editor.error = repr(e)
+        else:
+            # Keep the user's text for the value they're about to assign
+            mark_edited()
+            editor.value = new_value
+            editor.generation = _edit_generation
+            editor.error = None
+            result = True, new_value
+
+    if editor.error is not None:
+        imgui.text_colored((0.9, 0.01, 0.01, 1.0), f"ERROR: {editor.error}")
+    return result
 
 
 def show_uuid_editor(label: str, value: UUID):
@@ -178,7 +262,7 @@ def show_value_editor_in_place(obj, key):
     imgui.push_id(key)
     changed, new_value = show_value_editor(obj[key])
     if changed:
-        obj[key] = new_value
+        set_edited_value(obj, key, new_value)
     imgui.pop_id()
 
 
@@ -197,7 +281,7 @@ def show_labeled_value_editor_in_place(label, obj, key):
     imgui.push_id(key)
     changed, new_value = show_labeled_value_editor(label, obj[key])
     if changed:
-        obj[key] = new_value
+        set_edited_value(obj, key, new_value)
     imgui.pop_id()
     return changed
 
@@ -208,24 +292,25 @@ def show_value_tree_editor_in_place(obj, key):
     if isinstance(value, (dict, list)):
         is_open, is_removed = imgui.collapsing_header(str(key), True, imgui.TreeNodeFlags_.allow_overlap)
         if not is_open:
-            return
+            return False
 
+        changed = False
         imgui.push_id(key)
         imgui.indent()
         if isinstance(value, dict):
             for sub_key in value:
-                show_value_tree_editor_in_place(value, sub_key)
+                changed |= show_value_tree_editor_in_place(value, sub_key)
         if isinstance(value, list):
             for sub_key in range(len(value)):
-                show_value_tree_editor_in_place(value, sub_key)
+                changed |= show_value_tree_editor_in_place(value, sub_key)
         imgui.unindent()
         imgui.pop_id()
-        return
+        return changed
 
     imgui.push_id(key)
     changed, new_value = show_labeled_value_editor(str(key), value)
     if changed:
-        obj[key] = new_value
+        set_edited_value(obj, key, new_value)
     imgui.pop_id()
     return changed
 
@@ -271,7 +356,7 @@ def show_labeled_options_editor_in_place(
     imgui.pop_id()
 
     if changed:
-        obj[key] = new_value
+        set_edited_value(obj, key, new_value)
 
     return changed
 
@@ -341,6 +426,6 @@ def show_labeled_hashed_value_editor_in_place(label, obj, key, unhasher):
     imgui.push_id(key)
     changed, new_value = show_labeled_hashed_value_editor(label, obj[key], unhasher)
     if changed:
-        obj[key] = new_value
+        set_edited_value(obj, key, new_value)
     imgui.pop_id()
     return changed
@@ -21,7 +21,7 @@ import typing
 from imgui_bundle import imgui, portable_file_dialogs
 
 from bw_save_game.db_object import to_native
-from bw_save_game.veilguard import SHADER_PARAMS
+from bw_save_game.veilguard import SHADER_PARAMETER_NAMES
 
 
 def ask_for_file_to_open(message, wildcard, default_path=""):
@@ -53,12 +53,32 @@ def push_int_id(signed_id: int):
     imgui.push_id(signed_id - (signed_id & (1 << 31)))
 
 
+class RowValueCache(object):
+    """Per-row values of a (clipped) table, cached until the key changes.
+
+    Rows are only computed when they're visible, so values start out as NOT_CACHED.
+    """
+
+    NOT_CACHED = object()
+
+    def __init__(self):
+        self.key = None
+        self.values = []  # type: list
+
+    def get_values(self, key, num_rows: int) -> list:
+        if key != self.key:
+            self.key = key
+            self.values = [self.NOT_CACHED] * num_rows
+        return self.values
+
+    def clear(self):
+        self.key = None
+        self.values = []
+
+
 # ========================================================================
 # hash -> name mappers for different types:
 
 
 def unhash_shader_parameter(name_hash) -> typing.Optional[str]:
-    param = SHADER_PARAMS.get(to_native(name_hash))
-    if param:
-        return param["parameter_name"]
-    return None
+    return SHADER_PARAMETER_NAMES.get(to_native(name_hash))
@@ -21,6 +21,8 @@ from dataclasses import dataclass
 
 from imgui_bundle import imgui
 
+from bw_save_game.search import get_label_index
+
 
 @dataclass
 class ComboBoxState:
@@ -101,7 +103,7 @@ def show_searchable_combo_box(
     changed, new_value, new_pattern_compiled = show_regex_input("##ComboWithFilter_inputText", search_pattern)
     if changed:
         if new_value:
-            filtered_items = [i for i, item in enumerate(items) if new_pattern_compiled.search(item)]
+            filtered_items = get_label_index(items).search(new_value)
             retained_data.filtered_items = filtered_items
         else:
             filtered_items = None
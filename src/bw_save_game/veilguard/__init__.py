@@ -16,9 +16,18 @@
 #
 # Website: https://github.com/timniederhausen/bw_save_game
 # -*- coding: utf-8 -*-
+from . import data as _data
 from .data import *  # noqa: F401,F403
 from .highlevel import *  # noqa: F401,F403
 from .paramdb import *  # noqa: F401,F403
 from .persistence import *  # noqa: F401,F403
 from .scripts import *  # noqa: F401,F403
 from .types import *  # noqa: F401,F403
+
+
+def __getattr__(name: str):
+    # The data tables are loaded lazily, forward to the data module so they're only built when used
+    try:
+        return getattr(_data, name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
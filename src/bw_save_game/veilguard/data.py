@@ -16,68 +16,369 @@
 #
 # Website: https://github.com/timniederhausen/bw_save_game
 # -*- coding: utf-8 -*-
+import gc
+import hashlib
 import json
+import logging
+import pickle
+import struct
+import sys
+import threading
+import typing
 from uuid import UUID
 
 from importlib_resources import files
 
+from bw_save_game.cache import get_cache_path, write_cache_file
+from bw_save_game.hash import HashNameRegistry
+
+_logger = logging.getLogger(__name__)
+
 _FILES = files("bw_save_game.data").joinpath("veilguard")
 
 
+# Parsed data files are cached in a binary (pickle) format that is a lot faster to load than JSON.
+# Cache files are only used if the SHA-256 of their source file matches.
+_DATA_CACHE_MAGIC = b"BWDC"
+_DATA_CACHE_VERSION = 1
+_DATA_CACHE_HEADER = struct.Struct("<4sI32s")
+
+_DATA_FILE_NAMES = (
+    "items",
+    "currencies",
+    "skill_graphs",
+    "collectibles",
+    "quests",
+    "persistence",
+    "followers",
+    "maps",
+    "xp_thresholds",
+    "paramdb_keys",
+    "shader_params",
+)
+
+
+def _read_data_cache(cache_path: str, digest: bytes):
+    try:
+        with open(cache_path, "rb") as f:
+            header = f.read(_DATA_CACHE_HEADER.size)
+            if len(header) != _DATA_CACHE_HEADER.size:
+                return None
+            magic, version, cached_digest = _DATA_CACHE_HEADER.unpack(header)
+            if magic != _DATA_CACHE_MAGIC or version != _DATA_CACHE_VERSION or cached_digest != digest:
+                return None
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        _logger.debug("Ignoring broken data cache %s: %r", cache_path, e)
+        return None
+
+
 def _load_data_file(name: str):
-    with _FILES.joinpath(f"{name}.json").open() as fp:
-        return json.load(fp)
+    source = _FILES.joinpath(f"{name}.json").read_bytes()
+
+    cache_path = get_cache_path("veilguard", f"{name}.pickle")
+    if cache_path is None:
+        return json.loads(source)
+
+    digest = hashlib.sha256(source).digest()
+    table = _read_data_cache(cache_path, digest)
+    if table is None:
+        table = json.loads(source)
+        content = _DATA_CACHE_HEADER.pack(_DATA_CACHE_MAGIC, _DATA_CACHE_VERSION, digest)
+        write_cache_file(cache_path, content + pickle.dumps(table, pickle.HIGHEST_PROTOCOL))
+    return table
+
+
+def build_data_cache():
+    """(Re-)populate the binary cache for all data files, e.g. as part of a deployment."""
+    for name in _DATA_FILE_NAMES:
+        _load_data_file(name)
+
+
+# Large tables are stored as compact, read-only records instead of dicts: Records only store their values,
+# the field names are shared by all records with the same set of keys.
+class DataRecord(tuple):
+    """Immutable record with a read-only dict-like interface (record["name"], record.get("name"), ...)."""
+
+    __slots__ = ()
+
+    _fields = ()  # type: typing.Tuple[str, ...]
+    _field_index = {}  # type: typing.Dict[str, int]
+
+    def __getitem__(self, key: str):
+        try:
+            return tuple.__getitem__(self, self._field_index[key])
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key: str):
+        return key in self._field_index
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __eq__(self, other):
+        if isinstance(other, DataRecord):
+            return self._fields == other._fields and tuple.__eq__(self, other)
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = tuple.__hash__
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def __reduce__(self):
+        return _make_record, (self._fields, tuple(tuple.__iter__(self)))
+
+    def get(self, key: str, default=None):
+        index = self._field_index.get(key)
+        return default if index is None else tuple.__getitem__(self, index)
+
+    def keys(self):
+        return self._fields
+
+    def values(self):
+        return tuple(tuple.__iter__(self))
+
+    def items(self):
+        return zip(self._fields, tuple.__iter__(self))
+
+    def to_dict(self) -> dict:
+        return dict(self.items())
+
+
+_RECORD_TYPES = {}  # type: typing.Dict[typing.Tuple[str, ...], typing.Type[DataRecord]]
+
+
+def _get_record_type(fields: typing.Tuple[str, ...]) -> typing.Type[DataRecord]:
+    record_type = _RECORD_TYPES.get(fields)
+    if record_type is None:
+        record_type = type(
+            "DataRecord",
+            (DataRecord,),
+            dict(__slots__=(), _fields=fields, _field_index={f: i for i, f in enumerate(fields)}),
+        )
+        record_type = _RECORD_TYPES.setdefault(fields, record_type)
+    return record_type
+
+
+def _make_record(fields: typing.Tuple[str, ...], values: typing.Iterable) -> DataRecord:
+    return _get_record_type(fields)(values)
+
+
+# Values that end up in save games (e.g. persistence property defaults) are kept as-is
+_RAW_FIELDS = frozenset(("default",))
+
+
+def _to_records(value):
+    """Recursively convert the parsed JSON value to records (dicts) and tuples (lists)."""
+    if isinstance(value, dict):
+        fields = tuple(value.keys())
+        return _make_record(fields, (v if k in _RAW_FIELDS else _to_records(v) for k, v in value.items()))
+    if isinstance(value, list):
+        return tuple(map(_to_records, value))
+    return value
+
+
+# All tables below are only built when they're first accessed (see __getattr__ at the end),
+# so importing this module doesn't have to parse all data files.
+_LAZY_TABLES = {}
+_LAZY_TABLES_LOCK = threading.RLock()
+
+
+def _lazy_table(name: str):
+    def decorator(loader):
+        _LAZY_TABLES[name] = loader
+        return loader
+
+    return decorator
+
+
+def _get(name: str):
+    # Global lookups inside this module bypass __getattr__, so loaders use this to access other tables
+    return getattr(sys.modules[__name__], name)
 
 
 # from data files:
-ALL_ITEMS = _load_data_file("items")
-ALL_CURRENCIES = _load_data_file("currencies")
-ALL_SKILL_GRAPHS = _load_data_file("skill_graphs")
-ALL_COLLECTIBLES = _load_data_file("collectibles")
-ALL_QUESTS = _load_data_file("quests")
-ALL_PERSISTENCE_DEFINITIONS = _load_data_file("persistence")
-ALL_FOLLOWERS = _load_data_file("followers")
-ALL_MAPS = _load_data_file("maps")
-ALL_XP_THRESHOLDS = _load_data_file("xp_thresholds")
-ALL_PARAMDB_KEYS = _load_data_file("paramdb_keys")
-ALL_SHADER_PARAMS = _load_data_file("shader_params")
+def _lazy_data_file(table_name: str, file_name: str):
+    _LAZY_TABLES[table_name] = lambda: _load_data_file(file_name)
+
+
+_lazy_data_file("ALL_CURRENCIES", "currencies")
+_lazy_data_file("ALL_SKILL_GRAPHS", "skill_graphs")
+_lazy_data_file("ALL_COLLECTIBLES", "collectibles")
+_lazy_data_file("ALL_FOLLOWERS", "followers")
+_lazy_data_file("ALL_MAPS", "maps")
+_lazy_data_file("ALL_XP_THRESHOLDS", "xp_thresholds")
+_lazy_data_file("ALL_PARAMDB_KEYS", "paramdb_keys")
+_lazy_data_file("ALL_SHADER_PARAMS", "shader_params")
+
 
 # post-processing for data files:
-for item in ALL_ITEMS:
-    item["key"] = f"{item['name'] or 'NO NAME'} ({item['id']})"
-    item["guid"] = UUID(item["guid"])
+@_lazy_table("ALL_ITEMS")
+def _load_all_items():
+    all_items = _load_data_file("items")
+    for item in all_items:
+        item["key"] = f"{item['name'] or 'NO NAME'} ({item['id']})"
+        item["guid"] = UUID(item["guid"])
+    return _to_records(all_items)
+
+
+@_lazy_table("ITEM_ID_TO_INDEX")
+def _make_item_id_to_index():
+    return {item["id"]: i for i, item in enumerate(_get("ALL_ITEMS"))}
+
+
+@_lazy_table("ALL_QUESTS")
+def _load_all_quests():
+    return _to_records(_load_data_file("quests"))
+
+
+@_lazy_table("ALL_PERSISTENCE_DEFINITIONS")
+def _load_all_persistence_definitions():
+    return _to_records(_load_data_file("persistence"))
+
+
+@_lazy_table("SKILL_GRAPHS")
+def _make_skill_graphs():
+    return {g["id"]: g for g in _get("ALL_SKILL_GRAPHS")}
+
+
+@_lazy_table("COLLECTIBLES")
+def _make_collectibles():
+    return sorted(_get("ALL_COLLECTIBLES"), key=lambda s: s["name"])
+
+
+@_lazy_table("COLLECTIBLE_LABELS")
+def _make_collectible_labels():
+    return [s["name"] for s in _get("COLLECTIBLES")]
+
+
+@_lazy_table("PERSISTENCE_DEFINITIONS")
+def _make_persistence_definitions():
+    return {d["id"]: d for d in _get("ALL_PERSISTENCE_DEFINITIONS")}
+
 
-SKILL_GRAPHS = {g["id"]: g for g in ALL_SKILL_GRAPHS}
+@_lazy_table("PERSISTENCE_DEFINITION_LABELS")
+def _make_persistence_definition_labels():
+    return [d["name"] for d in _get("ALL_PERSISTENCE_DEFINITIONS")]
 
-COLLECTIBLES = sorted(ALL_COLLECTIBLES, key=lambda s: s["name"])
-COLLECTIBLE_LABELS = [s["name"] for s in COLLECTIBLES]
 
-PERSISTENCE_DEFINITIONS = {d["id"]: d for d in ALL_PERSISTENCE_DEFINITIONS}
-PERSISTENCE_DEFINITION_LABELS = [d["name"] for d in ALL_PERSISTENCE_DEFINITIONS]
+@_lazy_table("QUESTS")
+def _make_quests():
+    return {q["id"]: q for q in _get("ALL_QUESTS")}
 
-QUESTS = {q["id"]: q for q in ALL_QUESTS}
-QUEST_LABELS = [f"{q['debug_name']} ({q['name']})" if q["debug_name"] else q["name"] for q in ALL_QUESTS]
 
-PERSISTENCE_DEFINITION_TO_QUEST = {q["definition_id"]: q for q in ALL_QUESTS if q["definition_id"]}
+@_lazy_table("QUEST_LABELS")
+def _make_quest_labels():
+    return [f"{q['debug_name']} ({q['name']})" if q["debug_name"] else q["name"] for q in _get("ALL_QUESTS")]
 
 
+@_lazy_table("PERSISTENCE_DEFINITION_TO_QUEST")
+def _make_persistence_definition_to_quest():
+    return {q["definition_id"]: q for q in _get("ALL_QUESTS") if q["definition_id"]}
+
+
+@_lazy_table("TRANSITION_START_POINTS")
 def _make_transition_start_points():
     transition_start_points = set()
-    for m in ALL_MAPS:
+    for m in _get("ALL_MAPS"):
         if m["transition_start_point_name"]:
             transition_start_points.add(m["transition_start_point_name"])
         for n in m["region_transition_point_names"]:
             transition_start_points.add(n)
-    return transition_start_points
+    return sorted(transition_start_points)
+
+
+@_lazy_table("FOLLOWER_IDS")
+def _make_follower_ids():
+    return [0] + [f["id"] for f in _get("ALL_FOLLOWERS")]
+
+
+@_lazy_table("FOLLOWER_LABELS")
+def _make_follower_labels():
+    return ["<empty>"] + [f["name"] for f in _get("ALL_FOLLOWERS")]
+
+
+@_lazy_table("XP_THRESHOLDS")
+def _make_xp_thresholds():
+    return {m["name"]: m for m in _get("ALL_XP_THRESHOLDS")}
+
+
+@_lazy_table("PARAMDB_KEYS")
+def _make_paramdb_keys():
+    return {k["raw"]["hash"]: k for k in _get("ALL_PARAMDB_KEYS")}
+
+
+@_lazy_table("SHADER_PARAMS")
+def _make_shader_params():
+    return {p["parameter_name_hash"]: p for p in _get("ALL_SHADER_PARAMS")}
+
+
+# hash -> name lookup tables:
+@_lazy_table("SHADER_PARAMETER_NAMES")
+def _make_shader_parameter_names():
+    shader_parameter_names = HashNameRegistry()
+    shader_parameter_names.update((p["parameter_name_hash"], p["parameter_name"]) for p in _get("ALL_SHADER_PARAMS"))
+    return shader_parameter_names
+
+
+# Every name we know of, hashed with frostbite_fnv1_lowercase() (for reverse lookups in tools)
+@_lazy_table("KNOWN_NAMES")
+def _make_known_names():
+    return HashNameRegistry.from_names(
+        [p["parameter_name"] for p in _get("ALL_SHADER_PARAMS")]
+        + [k["name"] for k in _get("ALL_PARAMDB_KEYS")]
+        + _get("PERSISTENCE_DEFINITION_LABELS"),
+        get_cache_path("veilguard", "known_names.bin"),
+    )
+
+
+def __getattr__(name: str):
+    loader = _LAZY_TABLES.get(name)
+    if loader is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    with _LAZY_TABLES_LOCK:
+        # Another thread might've been faster
+        table = globals().get(name)
+        if table is None:
+            table = loader()
+            globals()[name] = table
+    return table
+
 
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_TABLES))
 
-TRANSITION_START_POINTS = sorted(_make_transition_start_points())
 
-FOLLOWER_IDS = [0] + [f["id"] for f in ALL_FOLLOWERS]
-FOLLOWER_LABELS = ["<empty>"] + [f["name"] for f in ALL_FOLLOWERS]
+def preload_data_tables(freeze: bool = False):
+    """Load all tables now instead of on first access.
 
-XP_THRESHOLDS = {m["name"]: m for m in ALL_XP_THRESHOLDS}
+    Call this in the parent process before forking a pool of workers: The children then share
+    the parent's tables (copy-on-write) instead of each building their own copies.
+    Reference counting still writes to every object a worker uses, so pages with tables the workers
+    read get copied anyway - only pages that are merely scanned by the garbage collector stay shared.
+    freeze=True helps with the latter: it runs gc.collect() and gc.freeze() on the *whole process*,
+    moving every object that exists at this point (not just our tables) to the permanent generation,
+    where it's never collected. Only use it right before forking.
+    Workers that are spawned instead of forked should use the binary cache (see build_data_cache()).
+    """
+    for name in list(_LAZY_TABLES):
+        _get(name)
+    if freeze:
+        gc.collect()
+        gc.freeze()
 
-PARAMDB_KEYS = {k["raw"]["hash"]: k for k in ALL_PARAMDB_KEYS}
 
-SHADER_PARAMS = {p["parameter_name_hash"]: p for p in ALL_SHADER_PARAMS}
+if __name__ == "__main__":
+    # e.g.     python -m bw_save_game.veilguard.data
+    build_data_cache()
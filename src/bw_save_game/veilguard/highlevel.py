@@ -16,10 +16,15 @@
 #
 # Website: https://github.com/timniederhausen/bw_save_game
 # -*- coding: utf-8 -*-
+import concurrent.futures
 import json
+import os
+import threading
 import time
 import typing
 from collections import defaultdict
+from contextlib import nullcontext
+from io import BytesIO
 from uuid import UUID
 
 from bw_save_game import (
@@ -29,15 +34,22 @@ from bw_save_game import (
     read_save_from_reader,
     write_save_to_writer,
 )
+from bw_save_game.atomic_file import atomic_open
 from bw_save_game.db_object import Long, from_raw_dict, to_native, to_raw_dict
+from bw_save_game.journal import EditJournal
+from bw_save_game.memory import MemoryUsage, measure
 from bw_save_game.persistence import (
+    PersistenceInstanceList,
     PersistenceKey,
     PersistencePropertyDefinition,
     get_persisted_value,
-    parse_persistence_key_string,
+    get_persisted_values,
     set_persisted_value,
+    set_persisted_values,
 )
-from bw_save_game.veilguard.data import XP_THRESHOLDS
+from bw_save_game.profiling import AnyStats, get_stats
+from bw_save_game.tasks import ProgressCallback, report_progress
+from bw_save_game.veilguard import data as veilguard_data
 from bw_save_game.veilguard.persistence import (
     DEFAULTXPBUCKET_XP,
     PLAYER_SKILLS,
@@ -53,56 +65,180 @@ from bw_save_game.veilguard.types import (
     ItemAttachmentType,
 )
 
+_background_writer = None  # type: typing.Optional[concurrent.futures.ThreadPoolExecutor]
+_background_writer_lock = threading.Lock()
+
+
+def _get_background_writer() -> concurrent.futures.ThreadPoolExecutor:
+    global _background_writer
+    with _background_writer_lock:
+        if _background_writer is None:
+            _background_writer = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="bw_save_game_writer")
+        return _background_writer
+
 
 class VeilguardSaveGame(object):
     def __init__(self, meta: dict, data: dict):
         self.meta = meta
         self.data = data
 
-        self._definition_id_to_instances, self._persistence_key_to_instance = self.build_persistence_instance_map()
+        self._contributor_map = {}  # type: typing.Dict[typing.Tuple[str, str, int], dict]
+        self._contributor_lists = {}  # type: typing.Dict[str, typing.Tuple[list, int]]
+        self.build_contributor_map()
+        # Incremented on every change made through this class, for caches of persistence data
+        self.persistence_revision = 0
+        # If set, all changes made through this class are recorded here (for undo/redo)
+        self.journal = None  # type: typing.Optional[EditJournal]
+        self._persistence = self._wrap_persistence_instances(self.get_registered_persistence()["RegisteredData"])
 
     @staticmethod
-    def from_file(fp):
-        m, d = read_save_from_reader(fp)
-        m = loads(m)
-        d = loads(d)
-        return VeilguardSaveGame(m, d)
+    def from_file(fp, on_progress: typing.Optional[ProgressCallback] = None, stats: typing.Optional[AnyStats] = None):
+        """Read a save game from fp.
+
+        on_progress(stage, fraction) is called between the different stages and may raise to abort loading.
+        If given, stats (a PipelineStats) collects the time spent in each stage.
+        """
+        stats = get_stats(stats)
+        report_progress(on_progress, "Reading", 0.0)
+        m, d = read_save_from_reader(fp, stats=stats)
+        report_progress(on_progress, "Decoding metadata", 0.3)
+        m = loads(m, stats=stats)
+        report_progress(on_progress, "Decoding data", 0.35)
+        d = loads(d, stats=stats)
+        report_progress(on_progress, "Building indexes", 0.9)
+        with stats.stage("build indexes") as s:
+            save_game = VeilguardSaveGame(m, d)
+            s.objects += len(save_game._contributor_map) + len(save_game._persistence)
+        return save_game
+
+    def to_file(
+        self,
+        fp,
+        on_progress: typing.Optional[ProgressCallback] = None,
+        atomic: bool = True,
+        stats: typing.Optional[AnyStats] = None,
+    ):
+        """Write the save game to fp (a binary file object or a path).
+
+        on_progress(stage, fraction) works like in from_file(). Once writing to fp starts, it isn't called anymore.
+        Paths are only opened once the whole save is encoded. With atomic=True, the new save replaces the old
+        file only after it's completely on disk, so a crash can't leave a corrupted save behind.
+        stats works like in from_file().
+        """
+        stats = get_stats(stats)
+        if isinstance(fp, (str, os.PathLike)):
+            buffer = BytesIO()
+            self.to_file(buffer, on_progress, stats=stats)
+            report_progress(on_progress, "Writing", 0.9)
+            with stats.stage("write file") as s:
+                with atomic_open(fp, "wb") if atomic else open(fp, "wb") as f:
+                    f.write(buffer.getbuffer())
+                s.bytes_in += buffer.getbuffer().nbytes
+            return
+
+        report_progress(on_progress, "Encoding metadata", 0.0)
+        m = dumps(self.meta, stats=stats)
+        report_progress(on_progress, "Encoding data", 0.05)
+        d = dumps(self.data, stats=stats)
+        report_progress(on_progress, "Compressing", 0.6)
+        write_save_to_writer(fp, m, d, stats=stats)
 
-    def to_file(self, fp):
-        m = dumps(self.meta)
-        d = dumps(self.data)
-        write_save_to_writer(fp, m, d)
+    def to_file_async(
+        self, path, on_progress: typing.Optional[ProgressCallback] = None, atomic: bool = True
+    ) -> concurrent.futures.Future:
+        """Like to_file(path), but encodes and writes the save on a background thread.
+
+        Saves are written one after another, in the order of the calls.
+        The save game must not be modified until the returned future is done.
+        """
+        return _get_background_writer().submit(self.to_file, path, on_progress, atomic)
 
     @staticmethod
-    def from_json(fp):
+    def from_json(fp, on_progress: typing.Optional[ProgressCallback] = None):
+        report_progress(on_progress, "Parsing JSON", 0.0)
         root = json.load(fp, object_hook=from_raw_dict)
 
         m = root["meta"]
         d = root["data"]
 
+        report_progress(on_progress, "Building indexes", 0.9)
         return VeilguardSaveGame(m, d)
 
-    def to_json(self, fp):
+    def to_json(self, fp, on_progress: typing.Optional[ProgressCallback] = None):
+        report_progress(on_progress, "Writing JSON", 0.0)
         root = dict(meta=self.meta, data=self.data, exporter=dict(version=__version__, format=1))
         json.dump(root, fp, ensure_ascii=False, indent=2, default=to_raw_dict)
 
+    def memory_footprint(self) -> typing.Dict[str, MemoryUsage]:
+        """Measure the Python memory used by the meta, client, server and persistence parts of this save.
+
+        Server contributors don't include the persistence instances (and their indexes), those are measured
+        on their own. Objects shared between the parts only count towards the first one.
+        """
+        seen = set()  # type: typing.Set[int]
+        return dict(
+            persistence=measure(self._persistence, seen),
+            server=measure(self.data["server"], seen),
+            client=measure(self.data["client"], seen),
+            meta=measure(self.meta, seen),
+        )
+
+    def build_contributor_map(self):
+        """(Re-)build the (side, name, loadpass) -> contributor lookup table."""
+        self._contributor_map.clear()
+        self._contributor_lists.clear()
+        for side in ("client", "server"):
+            contributors = self.data[side]["contributors"]
+            for c in contributors:
+                # Like a linear search, the first matching contributor wins
+                self._contributor_map.setdefault((side, c["name"], to_native(c["loadpass"])), c)
+            self._contributor_lists[side] = (contributors, len(contributors))
+
+    def invalidate_contributor_map(self):
+        self._contributor_lists.clear()
+
+    def _is_contributor_map_valid(self) -> bool:
+        # Catch contributors that were added / removed behind our back
+        for side, (contributors, num_contributors) in self._contributor_lists.items():
+            current = self.data[side]["contributors"]
+            if current is not contributors or len(current) != num_contributors:
+                return False
+        return len(self._contributor_lists) == 2
+
+    def get_contributor(self, side: str, name: str, loadpass: int = 0) -> typing.Optional[dict]:
+        if not self._is_contributor_map_valid():
+            self.build_contributor_map()
+        return self._contributor_map.get((side, name, loadpass))
+
+    def add_contributor(self, side: str, contributor: dict):
+        self.data[side]["contributors"].append(contributor)
+        self.build_contributor_map()
+
+    def remove_contributor(self, side: str, name: str, loadpass: int = 0) -> typing.Optional[dict]:
+        contributor = self.get_contributor(side, name, loadpass)
+        if contributor is not None:
+            contributors = self.data[side]["contributors"]
+            del contributors[next(i for i, c in enumerate(contributors) if c is contributor)]
+            self.build_contributor_map()
+        return contributor
+
     def get_client_rpg_extents(self, loadpass=0) -> dict:
-        for c in self.data["client"]["contributors"]:
-            if c["name"] == "RPGPlayerExtent" and to_native(c["loadpass"]) == loadpass:
-                return c["data"]
-        raise ValueError(f"No client RPGPlayerExtent with loadpass {loadpass}")
+        c = self.get_contributor("client", "RPGPlayerExtent", loadpass)
+        if c is None:
+            raise ValueError(f"No client RPGPlayerExtent with loadpass {loadpass}")
+        return c["data"]
 
     def get_server_rpg_extents(self, loadpass=0) -> dict:
-        for c in self.data["server"]["contributors"]:
-            if c["name"] == "RPGPlayerExtent" and to_native(c["loadpass"]) == loadpass:
-                return c["data"]
-        raise ValueError(f"No server RPGPlayerExtent with loadpass {loadpass}")
+        c = self.get_contributor("server", "RPGPlayerExtent", loadpass)
+        if c is None:
+            raise ValueError(f"No server RPGPlayerExtent with loadpass {loadpass}")
+        return c["data"]
 
     def get_client_difficulty(self, loadpass=0) -> dict:
-        for c in self.data["client"]["contributors"]:
-            if c["name"] == "DifficultyOptions" and to_native(c["loadpass"]) == loadpass:
-                return c["data"]
-        raise ValueError(f"No client DifficultyOptions with loadpass {loadpass}")
+        c = self.get_contributor("client", "DifficultyOptions", loadpass)
+        if c is None:
+            raise ValueError(f"No client DifficultyOptions with loadpass {loadpass}")
+        return c["data"]
 
     def get_currencies(self):
         first_extent = self.get_server_rpg_extents(0)
@@ -117,23 +253,42 @@ class VeilguardSaveGame(object):
         return first_extent.setdefault("items", [])
 
     def get_registered_persistence(self, loadpass: int = 0) -> dict:
-        for c in self.data["server"]["contributors"]:
-            if c["name"] == "RegisteredPersistence" and to_native(c["loadpass"]) == loadpass:
-                return c["data"]
-        raise ValueError(f"No RegisteredPersistence with loadpass {loadpass}")
+        c = self.get_contributor("server", "RegisteredPersistence", loadpass)
+        if c is None:
+            raise ValueError(f"No RegisteredPersistence with loadpass {loadpass}")
+        return c["data"]
 
-    def get_persistence_instances(self) -> typing.List[dict]:
-        return self.get_registered_persistence()["RegisteredData"]["Persistence"]
+    def get_persistence_instances(self) -> PersistenceInstanceList:
+        return self._persistence
 
     def set_persistence_instances(self, new_persistence: typing.List[dict]):
-        self.get_registered_persistence()["RegisteredData"]["Persistence"] = new_persistence
-        self._definition_id_to_instances, self._persistence_key_to_instance = self.build_persistence_instance_map()
+        registered_data = self.get_registered_persistence()["RegisteredData"]
+        registered_data["Persistence"] = new_persistence
+        self._persistence = self._wrap_persistence_instances(registered_data)
+        self.mark_persistence_changed()
+
+    def edit_group(self):
+        """Context manager that turns all changes inside it into a single undo step."""
+        if self.journal is None:
+            return nullcontext()
+        return self.journal.group()
+
+    def set_value(self, container, key, value):
+        """container[key] = value, recorded in our journal"""
+        if self.journal is None:
+            container[key] = value
+        else:
+            self.journal.set(container, key, value)
+
+    def mark_persistence_changed(self):
+        """Call this after modifying persistence instances directly (i.e. not through this class)."""
+        self.persistence_revision += 1
 
     def get_persistence_instance(self, key: PersistenceKey) -> typing.Optional[dict]:
-        return self._persistence_key_to_instance.get(key)
+        return self._persistence.key_to_instance.get(key)
 
     def get_persistence_instances_by_id(self, definition_id: int) -> typing.List[dict]:
-        return self._definition_id_to_instances[definition_id]
+        return self._persistence.definition_id_to_instances[definition_id]
 
     def make_persistence_instance(self, key: PersistenceKey) -> dict:
         new_instance = dict(
@@ -143,9 +298,11 @@ class VeilguardSaveGame(object):
             CreationTime=Long(time.time_ns() // 1000000000),
             PropertyValueData=dict(DefinitionProperties=[]),
         )
-        self.get_persistence_instances().append(new_instance)
-        self._persistence_key_to_instance[key] = new_instance
-        self._definition_id_to_instances[key.definition_id].append(new_instance)
+        if self.journal is None:
+            self._persistence.append(new_instance)
+        else:
+            self.journal.append(self._persistence, new_instance)
+        self.mark_persistence_changed()
         return new_instance
 
     def get_persistence_property(self, prop: PersistencePropertyDefinition):
@@ -155,68 +312,103 @@ class VeilguardSaveGame(object):
         return get_persisted_value(instance, prop.id, prop.type, prop.default)
 
     def set_persistence_property(self, prop: PersistencePropertyDefinition, value):
-        instance = self.get_persistence_instance(prop.key)
-        if instance is None:
-            instance = self.make_persistence_instance(prop.key)
-        set_persisted_value(instance, prop.id, prop.type, value)
-
-    def build_persistence_instance_map(self):
-        all_instances = self.get_persistence_instances()
-
-        definition_id_to_instances = defaultdict(list)
-        for instance in all_instances:
-            definition_id = to_native(instance["DefinitionId"])
-            definition_id_to_instances[definition_id].append(instance)
+        with self.edit_group():
+            instance = self.get_persistence_instance(prop.key)
+            if instance is None:
+                instance = self.make_persistence_instance(prop.key)
+            set_persisted_value(instance, prop.id, prop.type, value, self.journal)
+        self.mark_persistence_changed()
+
+    def get_persistence_properties(self, props: typing.Iterable[PersistencePropertyDefinition]) -> dict:
+        """Get the values of many properties at once, grouped by their persistence instance."""
+        props_by_key = defaultdict(list)
+        for prop in props:
+            props_by_key[prop.key].append(prop)
+
+        values = {}
+        for key, key_props in props_by_key.items():
+            instance = self.get_persistence_instance(key)
+            if instance is None:
+                values.update((prop, prop.default) for prop in key_props)
+                continue
+            key_values = get_persisted_values(instance, [(prop.id, prop.type, prop.default) for prop in key_props])
+            values.update(zip(key_props, key_values))
+        return values
+
+    def set_persistence_properties(self, values: typing.Mapping[PersistencePropertyDefinition, typing.Any]):
+        """Set the values of many properties at once, grouped by their persistence instance."""
+        values_by_key = defaultdict(list)
+        for prop, value in values.items():
+            values_by_key[prop.key].append((prop.id, prop.type, value))
+
+        with self.edit_group():
+            for key, key_values in values_by_key.items():
+                instance = self.get_persistence_instance(key)
+                if instance is None:
+                    instance = self.make_persistence_instance(key)
+                set_persisted_values(instance, key_values, self.journal)
+        self.mark_persistence_changed()
 
-        key_to_instance = {parse_persistence_key_string(instance["Key"]): instance for instance in all_instances}
-        return definition_id_to_instances, key_to_instance
+    @staticmethod
+    def _wrap_persistence_instances(registered_data: dict) -> PersistenceInstanceList:
+        # Swap the plain list inside our save data for one that keeps its indexes up-to-date
+        instances = registered_data["Persistence"]
+        if not isinstance(instances, PersistenceInstanceList):
+            instances = PersistenceInstanceList(instances)
+            registered_data["Persistence"] = instances
+        return instances
 
     def replace_character_archetype(self, old_archetype: int, new_archetype: int):
         if old_archetype == new_archetype:
             return
 
-        self.meta["archetype"] = new_archetype  # for save preview
-
-        client_rpg_player = self.get_client_rpg_extents(loadpass=0)
-        for transmogSlot in client_rpg_player["transmogSlots"]:
-            if to_native(transmogSlot["id"]) == old_archetype:
-                transmogSlot["id"] = new_archetype
-
-        server_rpg_player = self.get_server_rpg_extents(loadpass=0)
-        server_rpg_player["archetype"] = new_archetype
-        for item in server_rpg_player["items"]:
-            if "parent" not in item:
-                continue
-            parent = item["parent"]
-            if "parentArchetype" not in parent:
-                continue
-            if to_native(parent["parentArchetype"]["id"]) == old_archetype:
-                parent["parentArchetype"]["id"] = Long(new_archetype)
-
-        if new_archetype == CharacterArchetype.Mage:
-            skills_to_add = SKILLS_REQUIRED_MAGE
-        elif new_archetype == CharacterArchetype.Rogue:
-            skills_to_add = SKILLS_REQUIRED_ROGUE
-        elif new_archetype == CharacterArchetype.Warrior:
-            skills_to_add = SKILLS_REQUIRED_WARRIOR
-        else:
-            skills_to_add = []
-
-        for property_id in skills_to_add:
-            prop = PersistencePropertyDefinition(PLAYER_SKILLS, property_id, "Boolean", False)
-            self.set_persistence_property(prop, True)
+        with self.edit_group():
+            self.set_value(self.meta, "archetype", new_archetype)  # for save preview
+
+            client_rpg_player = self.get_client_rpg_extents(loadpass=0)
+            for transmogSlot in client_rpg_player["transmogSlots"]:
+                if to_native(transmogSlot["id"]) == old_archetype:
+                    self.set_value(transmogSlot, "id", new_archetype)
+
+            server_rpg_player = self.get_server_rpg_extents(loadpass=0)
+            self.set_value(server_rpg_player, "archetype", new_archetype)
+            for item in server_rpg_player["items"]:
+                if "parent" not in item:
+                    continue
+                parent = item["parent"]
+                if "parentArchetype" not in parent:
+                    continue
+                if to_native(parent["parentArchetype"]["id"]) == old_archetype:
+                    self.set_value(parent["parentArchetype"], "id", Long(new_archetype))
+
+            if new_archetype == CharacterArchetype.Mage:
+                skills_to_add = SKILLS_REQUIRED_MAGE
+            elif new_archetype == CharacterArchetype.Rogue:
+                skills_to_add = SKILLS_REQUIRED_ROGUE
+            elif new_archetype == CharacterArchetype.Warrior:
+                skills_to_add = SKILLS_REQUIRED_WARRIOR
+            else:
+                skills_to_add = []
+
+            self.set_persistence_properties(
+                {
+                    PersistencePropertyDefinition(PLAYER_SKILLS, property_id, "Boolean", False): True
+                    for property_id in skills_to_add
+                }
+            )
 
     def change_level(self, new_level: int):
-        self.set_persistence_property(PROGRESSION_CurrentLevel, new_level)
-        self.meta["projdata"]["level"] = new_level  # for save preview
+        with self.edit_group():
+            self.set_persistence_property(PROGRESSION_CurrentLevel, new_level)
+            self.set_value(self.meta["projdata"], "level", new_level)  # for save preview
 
-        min_xp_for_level = 0
-        for bucket in XP_THRESHOLDS["DefaultProgressionMap"]["level_thresholds"]:
-            if bucket["level"] == new_level:
-                min_xp_for_level = bucket["value"]
+            min_xp_for_level = 0
+            for bucket in veilguard_data.XP_THRESHOLDS["DefaultProgressionMap"]["level_thresholds"]:
+                if bucket["level"] == new_level:
+                    min_xp_for_level = bucket["value"]
 
-        self.set_persistence_property(PROGRESSION_XP_XP, min_xp_for_level)
-        self.set_persistence_property(DEFAULTXPBUCKET_XP, min_xp_for_level)
+            self.set_persistence_property(PROGRESSION_XP_XP, min_xp_for_level)
+            self.set_persistence_property(DEFAULTXPBUCKET_XP, min_xp_for_level)
 
 
 def deconstruct_item_attachment(item: dict) -> tuple[ItemAttachmentType, None | int | UUID, None | str]:
@@ -239,22 +431,45 @@ def deconstruct_item_attachment(item: dict) -> tuple[ItemAttachmentType, None |
     raise ValueError(f"Unsupported ItemAttachmentType type {attachment_type}")
 
 
-def construct_item_attachment(item: dict, typ: ItemAttachmentType, parent: int | UUID = None, attach_slot: str = None):
-    if typ == ItemAttachmentType.None_:
-        item.pop("parent", None)
-        item.pop("attachSlot", None)
-        return
-    if typ == ItemAttachmentType.Character:
-        item["parent"] = dict(attachmentType="Character", parentArchetype=dict(id=Long(parent)))
-    elif typ == ItemAttachmentType.ItemGuid:
-        item["parent"] = dict(attachmentType="ItemGuid", parentGuid=parent)
+def _set_item_value(item: dict, key: str, value, journal: typing.Optional[EditJournal]):
+    if journal is None:
+        item[key] = value
     else:
-        raise ValueError(f"Unsupported ItemAttachmentType type {typ}")
+        journal.set(item, key, value)
+
 
-    if attach_slot is not None:
-        item["attachSlot"] = attach_slot
+def _pop_item_value(item: dict, key: str, journal: typing.Optional[EditJournal]):
+    if journal is None:
+        item.pop(key, None)
     else:
-        item.pop("attachSlot", None)
+        journal.pop(item, key)
+
+
+def construct_item_attachment(
+    item: dict,
+    typ: ItemAttachmentType,
+    parent: int | UUID = None,
+    attach_slot: str = None,
+    journal: typing.Optional[EditJournal] = None,
+):
+    """Change the attachment of item, the change is recorded as a single step in journal (if given)."""
+    with nullcontext() if journal is None else journal.group():
+        if typ == ItemAttachmentType.None_:
+            _pop_item_value(item, "parent", journal)
+            _pop_item_value(item, "attachSlot", journal)
+            return
+        if typ == ItemAttachmentType.Character:
+            parent = dict(attachmentType="Character", parentArchetype=dict(id=Long(parent)))
+        elif typ == ItemAttachmentType.ItemGuid:
+            parent = dict(attachmentType="ItemGuid", parentGuid=parent)
+        else:
+            raise ValueError(f"Unsupported ItemAttachmentType type {typ}")
+        _set_item_value(item, "parent", parent, journal)
+
+        if attach_slot is not None:
+            _set_item_value(item, "attachSlot", attach_slot, journal)
+        else:
+            _pop_item_value(item, "attachSlot", journal)
 
 
 def item_attachment_to_string(item: dict):
@@ -267,8 +482,10 @@ def item_attachment_to_string(item: dict):
 
 
 def force_complete_quest(save_game: VeilguardSaveGame, quest_key: PersistenceKey):
-    save_game.set_persistence_property(
-        PersistencePropertyDefinition(quest_key, 1, "Uint8", 0),
-        EcoQuestRegisteredStateFlags.Eligible | EcoQuestRegisteredStateFlags.Completed,
+    quest_state = EcoQuestRegisteredStateFlags.Eligible | EcoQuestRegisteredStateFlags.Completed
+    save_game.set_persistence_properties(
+        {
+            PersistencePropertyDefinition(quest_key, 1, "Uint8", 0): quest_state,
+            PersistencePropertyDefinition(quest_key, 3, "Uint32", 0): 1,
+        }
     )
-    save_game.set_persistence_property(PersistencePropertyDefinition(quest_key, 3, "Uint32", 0), 1)
@@ -17,8 +17,11 @@
 # Website: https://github.com/timniederhausen/bw_save_game
 # -*- coding: utf-8 -*-
 import struct
+import typing
+from functools import lru_cache
+from itertools import chain
 
-from bw_save_game.veilguard.data import PARAMDB_KEYS
+from bw_save_game.veilguard import data
 
 PARAMDB_STRUCT = struct.Struct("<IHHQ")
 VEC4_PARAMDB_STRUCT = struct.Struct("<ffff")
@@ -33,12 +36,46 @@ class ParamDbKey(object):
 
     def __str__(self):
         try:
-            known_key = PARAMDB_KEYS[self.hash]
-            return f"ParamDb: {known_key["name"]} ({known_key["type_name"]})"
+            known_key = data.PARAMDB_KEYS[self.hash]
+            return f"ParamDb: {known_key['name']} ({known_key['type_name']})"
         except KeyError:
             return f"ParamDb: handle={self.handle} type={self.type_index} size={self.size} hash={self.hash}"
 
 
-def parse_ParamDbKeyData(wrapper) -> ParamDbKey:
-    vec4_repr = VEC4_PARAMDB_STRUCT.pack(*wrapper["data"])
+# ParamDb keys are stored as vec4s, so decoding them means reinterpreting the float bits.
+# Decoded keys and their labels are cached by their raw bytes (floats can't be used as keys: they might be NaNs).
+_PARAMDB_KEY_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=_PARAMDB_KEY_CACHE_SIZE)
+def _decode_ParamDbKey(vec4_repr: bytes) -> ParamDbKey:
     return ParamDbKey(*PARAMDB_STRUCT.unpack(vec4_repr))
+
+
+@lru_cache(maxsize=_PARAMDB_KEY_CACHE_SIZE)
+def _get_ParamDbKey_label(vec4_repr: bytes) -> str:
+    return str(_decode_ParamDbKey(vec4_repr))
+
+
+def _pack_ParamDbKeyData_list(wrappers: typing.Sequence) -> bytes:
+    return struct.pack(f"<{4 * len(wrappers)}f", *chain.from_iterable(w["data"] for w in wrappers))
+
+
+def parse_ParamDbKeyData(wrapper) -> ParamDbKey:
+    """Decode a ParamDbKeyData wrapper. The returned (cached) keys must not be modified."""
+    return _decode_ParamDbKey(VEC4_PARAMDB_STRUCT.pack(*wrapper["data"]))
+
+
+def get_ParamDbKeyData_label(wrapper) -> str:
+    return _get_ParamDbKey_label(VEC4_PARAMDB_STRUCT.pack(*wrapper["data"]))
+
+
+def parse_ParamDbKeyData_list(wrappers: typing.Sequence) -> typing.List[ParamDbKey]:
+    """Decode a whole list of ParamDbKeyData wrappers at once."""
+    return [ParamDbKey(*fields) for fields in PARAMDB_STRUCT.iter_unpack(_pack_ParamDbKeyData_list(wrappers))]
+
+
+def get_ParamDbKeyData_labels(wrappers: typing.Sequence) -> typing.List[str]:
+    raw = _pack_ParamDbKeyData_list(wrappers)
+    size = VEC4_PARAMDB_STRUCT.size
+    return [_get_ParamDbKey_label(raw[i : i + size]) for i in range(0, len(raw), size)]
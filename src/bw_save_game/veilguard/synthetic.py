@@ -0,0 +1,158 @@
+# bw-save-game - BioWare save game tools
+# Copyright (C) 2024 Tim Niederhausen
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Website: https://github.com/timniederhausen/bw_save_game
+# -*- coding: utf-8 -*-
+import argparse
+import copy
+import itertools
+import random
+import typing
+from uuid import UUID
+
+from bw_save_game import dumps, loads, read_save_from_reader, write_save_to_writer
+from bw_save_game.db_object import Long, to_native
+from bw_save_game.persistence import (
+    RegisteredPersistenceKey,
+    parse_persistence_key_string,
+)
+
+# Generates (much) bigger save games from actual ones, for benchmarks and memory measurements.
+# New items, persistence instances and properties are copies of the template's with fresh ids:
+# the results have the same shapes as real saves, but won't make any sense to the game.
+
+
+def _get_server_contributor_data(data: dict, name: str) -> dict:
+    for contributor in data["server"]["contributors"]:
+        if contributor["name"] == name and to_native(contributor["loadpass"]) == 0:
+            return contributor["data"]
+    raise ValueError(f"Template has no server {name}")
+
+
+def _unique_ids(rng: random.Random, used: typing.Set[int]) -> typing.Iterator[int]:
+    while True:
+        value = rng.randrange(1, 1 << 32)
+        if value not in used:
+            used.add(value)
+            yield value
+
+
+def _resize(values: list, count: int, make_copy: typing.Callable[[typing.Any], typing.Any]):
+    if count <= len(values):
+        del values[count:]
+        return
+    if not values:
+        raise ValueError("Template has nothing to copy")
+    templates = itertools.cycle(list(values))
+    values.extend(make_copy(next(templates)) for _ in range(count - len(values)))
+
+
+def _make_properties(templates: typing.List[dict], count: int, rng: random.Random) -> typing.List[dict]:
+    used = set()  # type: typing.Set[int]
+    property_ids = _unique_ids(rng, used)
+    properties = []
+    for template in itertools.islice(itertools.cycle(templates), count):
+        ((name, value),) = template.items()
+        property_type = name.rpartition(":")[2]
+        properties.append({f",{next(property_ids)}:{property_type}": copy.deepcopy(value)})
+    return properties
+
+
+def generate_save_data(
+    meta: dict,
+    data: dict,
+    scale: int = 1,
+    num_items: typing.Optional[int] = None,
+    num_persistence_instances: typing.Optional[int] = None,
+    properties_per_instance: typing.Optional[int] = None,
+    seed: int = 0,
+) -> typing.Tuple[dict, dict]:
+    """Build a bigger (or smaller) copy of the decoded save game trees meta and data.
+
+    num_items and num_persistence_instances default to scale times the template's counts.
+    Generated persistence instances have properties_per_instance properties (default: as many as the copied one).
+    The same seed always produces the same save.
+    """
+    rng = random.Random(seed)
+    meta = copy.deepcopy(meta)
+    data = copy.deepcopy(data)
+
+    items = _get_server_contributor_data(data, "RPGPlayerExtent").setdefault("items", [])
+    if num_items is None:
+        num_items = len(items) * scale
+
+    def copy_item(item: dict) -> dict:
+        item = copy.deepcopy(item)
+        item["instanceGuid"] = UUID(int=rng.getrandbits(128), version=4)
+        return item
+
+    _resize(items, num_items, copy_item)
+
+    instances = _get_server_contributor_data(data, "RegisteredPersistence")["RegisteredData"]["Persistence"]
+    if num_persistence_instances is None:
+        num_persistence_instances = len(instances) * scale
+    property_templates = [p for instance in instances for p in instance["PropertyValueData"]["DefinitionProperties"]]
+    definition_ids = _unique_ids(rng, {to_native(instance["DefinitionId"]) for instance in instances})
+
+    def copy_instance(instance: dict) -> dict:
+        instance = copy.deepcopy(instance)
+        key = parse_persistence_key_string(instance["Key"])
+        definition_id = next(definition_ids)
+        if isinstance(key, RegisteredPersistenceKey):
+            key = RegisteredPersistenceKey(key.version, key.family, definition_id, None, key.uid, key.persona_id)
+        else:
+            key = type(key)(key.version, key.family, definition_id)
+        instance["DefinitionId"] = Long(definition_id)
+        instance["Key"] = str(key)
+        if properties_per_instance is not None:
+            instance["PropertyValueData"]["DefinitionProperties"] = _make_properties(
+                property_templates, properties_per_instance, rng
+            )
+        return instance
+
+    _resize(instances, num_persistence_instances, copy_instance)
+    return meta, data
+
+
+def generate_save_file(template: typing.BinaryIO, output: typing.BinaryIO, **kwargs):
+    """Read the .csav template, generate a new save from it and write it to output.
+
+    kwargs are passed to generate_save_data().
+    """
+    meta, data = read_save_from_reader(template)
+    meta, data = generate_save_data(loads(meta), loads(data), **kwargs)
+    write_save_to_writer(output, dumps(meta), dumps(data))
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Generate a big save game for testing from an existing one")
+    parser.add_argument("template", help="Path to the input save game .csav")
+    parser.add_argument("output", help="Path to the output save game .csav")
+    parser.add_argument("--scale", type=int, default=10, help="multiply the number of items and persistence instances")
+    parser.add_argument("--items", dest="num_items", type=int)
+    parser.add_argument("--persistence-instances", dest="num_persistence_instances", type=int)
+    parser.add_argument("--properties-per-instance", dest="properties_per_instance", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    args = vars(parser.parse_args(args))
+
+    template, output = args.pop("template"), args.pop("output")
+    with open(template, "rb") as f_in, open(output, "wb") as f_out:
+        generate_save_file(f_in, f_out, **args)
+
+
+if __name__ == "__main__":
+    # e.g.     python -m bw_save_game.veilguard.synthetic test.csav big.csav --scale 100
+    main()
@@ -1,10 +1,26 @@
 """
-    Dummy conftest.py for bw_save_game.
+    Shared fixtures for the bw_save_game tests.
 
-    If you don't know what this is for, just leave it empty.
     Read more about conftest.py under:
     - https://docs.pytest.org/en/stable/fixture.html
     - https://docs.pytest.org/en/stable/writing_plugins.html
 """
 
-# import pytest
+from pathlib import Path
+
+import pytest
+
+from bw_save_game.veilguard.highlevel import VeilguardSaveGame
+
+
+@pytest.fixture(scope="session")
+def save_game_path() -> Path:
+    """One of the actual save games in tests/data"""
+    return Path(__file__).parent / "data" / "correct_romance_1.csav"
+
+
+@pytest.fixture
+def save_game(save_game_path) -> VeilguardSaveGame:
+    """A freshly loaded save game, tests can modify it"""
+    with open(save_game_path, "rb") as f:
+        return VeilguardSaveGame.from_file(f)
@@ -0,0 +1,75 @@
+# bw-save-game - BioWare save game tools
+# Copyright (C) 2024 Tim Niederhausen
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Website: https://github.com/timniederhausen/bw_save_game
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+from bw_save_game.atomic_file import atomic_open
+from bw_save_game.veilguard.highlevel import VeilguardSaveGame
+
+
+def test_atomic_open(tmp_path):
+    target = tmp_path / "save.csav"
+    with atomic_open(target) as f:
+        f.write(b"first")
+    assert target.read_bytes() == b"first"
+
+    if os.name == "posix":
+        os.chmod(target, 0o640)
+    with atomic_open(target, "w", encoding="utf-8") as f:
+        f.write("second")
+    assert target.read_text(encoding="utf-8") == "second"
+    if os.name == "posix":
+        assert os.stat(target).st_mode & 0o777 == 0o640
+
+    # failures leave the old file alone
+    with pytest.raises(RuntimeError):
+        with atomic_open(target) as f:
+            f.write(b"partial")
+            raise RuntimeError()
+    assert target.read_text(encoding="utf-8") == "second"
+    assert os.listdir(tmp_path) == ["save.csav"]
+
+    with pytest.raises(ValueError):
+        with atomic_open(target, "rb"):
+            pass
+
+
+@pytest.mark.skipif(os.name != "posix", reason="needs POSIX permissions")
+def test_atomic_open_new_file_mode(tmp_path):
+    old_umask = os.umask(0o027)
+    try:
+        with atomic_open(tmp_path / "new.csav") as f:
+            f.write(b"new")
+    finally:
+        os.umask(old_umask)
+    assert os.stat(tmp_path / "new.csav").st_mode & 0o777 == 0o640
+
+
+def test_save_game_to_path(tmp_path, save_game):
+    target = tmp_path / "save.csav"
+    save_game.to_file(target)
+    save_game.to_file_async(str(tmp_path / "async.csav")).result(timeout=30)
+    save_game.to_file(tmp_path / "direct.csav", atomic=False)
+
+    for path in (target, tmp_path / "async.csav", tmp_path / "direct.csav"):
+        with open(path, "rb") as f:
+            reloaded = VeilguardSaveGame.from_file(f)
+        assert reloaded.meta == save_game.meta
+        assert reloaded.data == save_game.data
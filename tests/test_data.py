@@ -0,0 +1,132 @@
+# bw-save-game - BioWare save game tools
+# Copyright (C) 2024 Tim Niederhausen
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Website: https://github.com/timniederhausen/bw_save_game
+# -*- coding: utf-8 -*-
+import json
+import pickle
+from uuid import UUID
+
+import pytest
+
+import bw_save_game.veilguard as veilguard
+from bw_save_game.cache import CACHE_DIR_ENV
+from bw_save_game.veilguard import data
+
+_ITEM_GUID = "0c4a4a35-2f5e-4b8e-8d32-5a1f0f3e8c11"
+
+
+def test_tables_are_loaded_lazily(monkeypatch):
+    loaded_files = []
+
+    def fake_load_data_file(name: str):
+        loaded_files.append(name)
+        return [dict(id=1, name="Sword", guid=_ITEM_GUID)]
+
+    monkeypatch.setattr(data, "_load_data_file", fake_load_data_file)
+    try:
+        assert "ALL_ITEMS" not in vars(data)
+        assert "ALL_ITEMS" in dir(data)
+
+        items = veilguard.ALL_ITEMS
+        assert loaded_files == ["items"]
+        assert items[0]["key"] == "Sword (1)"
+        assert items[0]["guid"] == UUID(_ITEM_GUID)
+
+        # loaded only once
+        assert data.ALL_ITEMS is items
+        assert loaded_files == ["items"]
+    finally:
+        vars(data).pop("ALL_ITEMS", None)
+
+
+def test_binary_data_cache(monkeypatch, tmp_path):
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    (source_dir / "maps.json").write_text(json.dumps([dict(name="Minrathous")]), encoding="utf-8")
+    monkeypatch.setattr(data, "_FILES", source_dir)
+    monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path / "cache"))
+
+    assert data._load_data_file("maps") == [dict(name="Minrathous")]
+    assert (tmp_path / "cache" / "veilguard" / "maps.pickle").is_file()
+
+    # the second load must come from our cache
+    class NoJson:
+        @staticmethod
+        def loads(source):
+            pytest.fail("JSON was parsed again")
+
+    with monkeypatch.context() as m:
+        m.setattr(data, "json", NoJson)
+        assert data._load_data_file("maps") == [dict(name="Minrathous")]
+
+    # changes to the source invalidate the cache
+    (source_dir / "maps.json").write_text(json.dumps([dict(name="Treviso")]), encoding="utf-8")
+    assert data._load_data_file("maps") == [dict(name="Treviso")]
+
+    # as does disabling it
+    monkeypatch.setenv(CACHE_DIR_ENV, "")
+    (tmp_path / "cache" / "veilguard" / "maps.pickle").write_bytes(b"garbage")
+    assert data._load_data_file("maps") == [dict(name="Treviso")]
+
+
+def test_records():
+    definitions = data._to_records(
+        [
+            dict(id=1, name="Quest", properties=[dict(id=2, name="_QuestState", default=dict(a=[1]))]),
+            dict(id=3, name="Other", properties=[]),
+        ]
+    )
+    assert isinstance(definitions, tuple)
+
+    definition = definitions[0]
+    assert isinstance(definition, data.DataRecord)
+    assert type(definition) is type(definitions[1])
+    assert definition["name"] == "Quest"
+    assert definition.get("missing", 42) == 42
+    assert "properties" in definition and "missing" not in definition
+    assert list(definition) == ["id", "name", "properties"]
+    with pytest.raises(KeyError):
+        definition["missing"]
+    with pytest.raises(AttributeError):
+        definition.name = "Changed"
+
+    prop = definition["properties"][0]
+    assert prop["name"] == "_QuestState"
+    assert prop["default"] == dict(a=[1]) and isinstance(prop["default"], dict)
+
+    assert definition == dict(id=1, name="Quest", properties=(prop,))
+    assert definition != definitions[1]
+    assert pickle.loads(pickle.dumps(definition)) == definition
+    assert json.loads(json.dumps(definition.to_dict()["properties"][0].to_dict())) == dict(
+        id=2, name="_QuestState", default=dict(a=[1])
+    )
+
+
+def test_preload_data_tables(monkeypatch):
+    frozen = []
+    monkeypatch.setattr(data, "_LAZY_TABLES", dict(TABLE_A=lambda: [1], TABLE_B=lambda: data._get("TABLE_A") + [2]))
+    monkeypatch.setattr(data.gc, "freeze", lambda: frozen.append(True))
+    try:
+        data.preload_data_tables()
+        assert vars(data)["TABLE_A"] == [1]
+        assert vars(data)["TABLE_B"] == [1, 2]
+        assert frozen == []
+        data.preload_data_tables(freeze=True)
+        assert frozen == [True]
+    finally:
+        vars(data).pop("TABLE_A", None)
+        vars(data).pop("TABLE_B", None)
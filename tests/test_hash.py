@@ -0,0 +1,82 @@
+# bw-save-game - BioWare save game tools
+# Copyright (C) 2024 Tim Niederhausen
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Website: https://github.com/timniederhausen/bw_save_game
+# -*- coding: utf-8 -*-
+import random
+from io import BytesIO
+
+from bw_save_game.hash import (
+    HashNameRegistry,
+    frostbite_fnv1,
+    frostbite_fnv1_lowercase,
+    frostbite_fnv1_lowercase_many,
+    frostbite_fnv1_many,
+)
+
+
+def reference_fnv1(data: bytes, lowercase: bool):
+    # straight-forward byte-by-byte version of the game's hash function
+    h = 5381
+    for byte in data:
+        if lowercase:
+            byte = (byte + 32 * ((byte - 65) & 0xFF <= 0x19)) & 0xFF
+        h = (((33 * h) & 0xFFFFFFFF) ^ byte) & 0xFFFFFFFF
+    return h
+
+
+def test_known_hashes():
+    name = b"Characters/Generic/Universal/Makeup/Blush_Makeup/HF_MAK_Blush_12A_Mask"
+    assert frostbite_fnv1_lowercase(name) == 3828825916
+    assert frostbite_fnv1(b"") == 5381
+
+
+def test_matches_reference():
+    rng = random.Random(1234)
+    inputs = [bytes(rng.randrange(256) for _ in range(rng.randrange(200))) for _ in range(200)]
+    for data in inputs:
+        assert frostbite_fnv1(data) == reference_fnv1(data, False)
+        assert frostbite_fnv1_lowercase(data) == reference_fnv1(data, True)
+
+    assert frostbite_fnv1_many(inputs) == [reference_fnv1(data, False) for data in inputs]
+    assert frostbite_fnv1_lowercase_many(inputs) == [reference_fnv1(data, True) for data in inputs]
+    assert frostbite_fnv1_lowercase_many(["ParamName"]) == [frostbite_fnv1_lowercase(b"paramname")]
+
+
+def test_registry_cache(tmp_path):
+    names = ["ParamName", "paramname", "Other/Name", ""]
+    cache_path = str(tmp_path / "sub" / "names.bin")
+
+    registry = HashNameRegistry.from_names(names, cache_path)
+    assert len(registry) == 3
+    assert registry.get(frostbite_fnv1_lowercase(b"PARAMNAME")) == "ParamName"
+    assert registry.get(frostbite_fnv1_lowercase(b"Other/Name")) == "Other/Name"
+    assert registry.get(1) is None
+
+    cached = HashNameRegistry()
+    with open(cache_path, "rb") as f:
+        assert cached.load(f, HashNameRegistry.digest_names(names))
+    assert dict(cached.items()) == dict(registry.items())
+
+    # a different name list must not use the stale table
+    with open(cache_path, "rb") as f:
+        assert not HashNameRegistry().load(f, HashNameRegistry.digest_names(names[:1]))
+    assert len(HashNameRegistry.from_names(names[:1], cache_path)) == 1
+
+    empty = BytesIO()
+    HashNameRegistry().save(empty, b"x" * 20)
+    empty.seek(0)
+    assert HashNameRegistry().load(empty, b"x" * 20)
@@ -0,0 +1,78 @@
+# bw-save-game - BioWare save game tools
+# Copyright (C) 2024 Tim Niederhausen
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Website: https://github.com/timniederhausen/bw_save_game
+# -*- coding: utf-8 -*-
+from bw_save_game.db_object import to_native
+
+
+def _find_contributor(save_game, side, name, loadpass=0):
+    # the linear search the contributor index replaces
+    for c in save_game.data[side]["contributors"]:
+        if c["name"] == name and to_native(c["loadpass"]) == loadpass:
+            return c
+    return None
+
+
+def test_contributor_lookup(save_game):
+    for side in ("client", "server"):
+        for c in save_game.data[side]["contributors"]:
+            loadpass = to_native(c["loadpass"])
+            assert save_game.get_contributor(side, c["name"], loadpass) is _find_contributor(
+                save_game, side, c["name"], loadpass
+            )
+    assert save_game.get_contributor("server", "DoesNotExist") is None
+
+
+def test_add_remove_contributor(save_game):
+    contributor = dict(name="TestContributor", loadpass=0, data={})
+    save_game.add_contributor("server", contributor)
+    assert save_game.get_contributor("server", "TestContributor") is contributor
+    assert save_game.get_contributor("client", "TestContributor") is None
+
+    # the first contributor with a name / loadpass wins
+    save_game.add_contributor("server", dict(name="TestContributor", loadpass=0, data={}))
+    assert save_game.get_contributor("server", "TestContributor") is contributor
+
+    assert save_game.remove_contributor("server", "TestContributor") is contributor
+    assert save_game.get_contributor("server", "TestContributor") is not contributor
+    assert save_game.remove_contributor("server", "TestContributor") is not None
+    assert save_game.get_contributor("server", "TestContributor") is None
+    assert save_game.remove_contributor("server", "TestContributor") is None
+
+
+def test_contributor_changes_behind_our_back(save_game):
+    contributors = save_game.data["server"]["contributors"]
+    save_game.get_contributor("server", "RPGPlayerExtent")  # build the index
+
+    # appending to the list directly is detected
+    contributor = dict(name="TestContributor", loadpass=1, data={})
+    contributors.append(contributor)
+    assert save_game.get_contributor("server", "TestContributor", 1) is contributor
+
+    # as is replacing the whole list
+    save_game.data["server"]["contributors"] = [contributor]
+    assert save_game.get_contributor("server", "RPGPlayerExtent") is None
+    save_game.data["server"]["contributors"] = contributors
+    assert save_game.get_contributor("server", "RPGPlayerExtent") is not None
+
+    # replacing a contributor in-place isn't, that needs invalidate_contributor_map()
+    replacement = dict(name="Replacement", loadpass=0, data={})
+    contributors[-1] = replacement
+    assert save_game.get_contributor("server", "Replacement") is None
+    save_game.invalidate_contributor_map()
+    assert save_game.get_contributor("server", "Replacement") is replacement
+    assert save_game.get_contributor("server", "TestContributor", 1) is None
@@ -0,0 +1,159 @@
+# bw-save-game - BioWare save game tools
+# Copyright (C) 2024 Tim Niederhausen
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Website: https://github.com/timniederhausen/bw_save_game
+# -*- coding: utf-8 -*-
+from bw_save_game.journal import EditJournal
+from bw_save_game.persistence import (
+    PersistencePropertyDefinition,
+    get_persisted_value,
+    registered_persistence_key,
+    set_persisted_value,
+)
+from bw_save_game.veilguard.highlevel import (
+    construct_item_attachment,
+    deconstruct_item_attachment,
+)
+from bw_save_game.veilguard.types import ItemAttachmentType
+
+
+def test_set_undo_redo():
+    journal = EditJournal()
+    obj = dict(a=1, b=[1, 2])
+    journal.set(obj, "a", 2)
+    journal.set(obj, "c", 3)
+    journal.set(obj["b"], 0, 5)
+    assert obj == dict(a=2, b=[5, 2], c=3)
+
+    assert journal.undo()
+    assert obj == dict(a=2, b=[1, 2], c=3)
+    assert journal.undo()
+    assert obj == dict(a=2, b=[1, 2])
+    assert journal.undo()
+    assert obj == dict(a=1, b=[1, 2])
+    assert not journal.undo()
+
+    assert journal.redo() and journal.redo() and journal.redo()
+    assert obj == dict(a=2, b=[5, 2], c=3)
+    assert not journal.redo()
+    assert journal.version == 6
+
+
+def test_list_operations():
+    journal = EditJournal()
+    items = [1, 2, 3]
+    journal.append(items, 4)
+    journal.insert(items, 0, 0)
+    journal.delete(items, -1)
+    assert items == [0, 1, 2, 3]
+
+    journal.undo()
+    assert items == [0, 1, 2, 3, 4]
+    journal.undo()
+    journal.undo()
+    assert items == [1, 2, 3]
+    journal.redo()
+    journal.redo()
+    journal.redo()
+    assert items == [0, 1, 2, 3]
+
+
+def test_groups_and_merging():
+    journal = EditJournal()
+    obj = dict(a=0, b=0)
+    with journal.group():
+        journal.set(obj, "a", 1)
+        with journal.group():
+            journal.set(obj, "b", 1)
+    assert len(journal) == 1
+
+    # e.g. dragging a slider
+    for i in range(10):
+        journal.set(obj, "a", 10 + i)
+    assert len(journal) == 2
+
+    # a new edit clears the redo stack
+    journal.undo()
+    assert obj == dict(a=1, b=1)
+    journal.set(obj, "b", 2)
+    assert not journal.can_redo()
+
+    journal.undo()
+    journal.undo()
+    assert obj == dict(a=0, b=0)
+
+    # groups setting the same values are merged as well (e.g. a name synced to several places)
+    journal.clear()
+    for i in range(3):
+        with journal.group():
+            journal.set(obj, "a", i)
+            journal.set(obj, "b", i)
+    assert len(journal) == 1
+    journal.undo()
+    assert obj == dict(a=0, b=0)
+
+    journal = EditJournal(max_entries=2, merge_interval=0)
+    for i in range(5):
+        journal.set(obj, "a", i)
+    assert len(journal) == 2
+
+
+def test_item_attachment_edits():
+    journal = EditJournal()
+    item = dict(itemDataId=1)
+    construct_item_attachment(item, ItemAttachmentType.Character, 240491018, "Item_LyriumDagger", journal)
+    construct_item_attachment(item, ItemAttachmentType.None_, journal=journal)
+    assert item == dict(itemDataId=1)
+
+    assert journal.undo()
+    assert deconstruct_item_attachment(item) == (ItemAttachmentType.Character, 240491018, "Item_LyriumDagger")
+    assert journal.undo()
+    assert item == dict(itemDataId=1)
+    assert not journal.can_undo()
+
+
+def test_persistence_edits():
+    journal = EditJournal()
+    instance = dict(PropertyValueData=dict(DefinitionProperties=[{",1:Uint8": 1}]))
+    set_persisted_value(instance, 1, "Uint8", 2, journal)
+    set_persisted_value(instance, 2, "Boolean", True, journal)
+    assert journal.undo()
+    assert instance == dict(PropertyValueData=dict(DefinitionProperties=[{",1:Uint8": 2}]))
+    assert journal.undo()
+    assert get_persisted_value(instance, 1, "Uint8", 0) == 1
+
+
+def test_save_game_edits(save_game):
+    save_game.journal = EditJournal()
+    num_instances = len(save_game.get_persistence_instances())
+
+    key = registered_persistence_key(123456789)
+    props = {
+        PersistencePropertyDefinition(key, 1, "Uint8", 0): 3,
+        PersistencePropertyDefinition(key, 2, "Uint32", 0): 4,
+    }
+    save_game.set_persistence_properties(props)
+    assert save_game.get_persistence_properties(props) == props
+    assert len(save_game.get_persistence_instances()) == num_instances + 1
+
+    # undoes the whole batch, including the new instance
+    assert save_game.journal.undo()
+    assert save_game.get_persistence_instance(key) is None
+    assert len(save_game.get_persistence_instances()) == num_instances
+    assert save_game.get_persistence_properties(props) == {p: 0 for p in props}
+
+    assert save_game.journal.redo()
+    assert save_game.get_persistence_properties(props) == props
@@ -0,0 +1,53 @@
+# bw-save-game - BioWare save game tools
+# Copyright (C) 2024 Tim Niederhausen
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Website: https://github.com/timniederhausen/bw_save_game
+# -*- coding: utf-8 -*-
+import sys
+from uuid import UUID
+
+from bw_save_game.db_object import Long, Vector4D
+from bw_save_game.memory import measure
+
+
+def test_measure():
+    shared = Long(1 << 40)
+    tree = {"a": [shared, shared, UUID(int=1)], "b": Vector4D(1.0, 2.0, 3.0, 4.0)}
+    usage = measure(tree)
+
+    assert usage.counts["Long"] == 1
+    assert usage.counts["UUID"] == 1
+    assert usage.counts["Vector4D"] == 1
+    assert usage.counts["float"] == 4
+    assert usage.size >= sys.getsizeof(tree) + sys.getsizeof(tree["a"])
+    assert usage.objects == sum(usage.counts.values())
+    assert usage.size == sum(usage.sizes.values())
+
+    # already seen objects aren't counted again
+    seen = set()
+    measure(shared, seen)
+    assert measure(tree, seen).counts["Long"] == 0
+
+
+def test_save_game_memory_footprint(save_game):
+    footprint = save_game.memory_footprint()
+    assert list(footprint) == ["persistence", "server", "client", "meta"]
+    assert footprint["persistence"].counts["PersistenceInstanceList"] == 1
+    assert footprint["server"].counts["PersistenceInstanceList"] == 0
+    for usage in footprint.values():
+        assert usage.size > 0
+        assert usage.counts["Long"] > 0
+    assert "Long" in footprint["server"].format_report()
@@ -0,0 +1,64 @@
+# bw-save-game - BioWare save game tools
+# Copyright (C) 2024 Tim Niederhausen
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Website: https://github.com/timniederhausen/bw_save_game
+# -*- coding: utf-8 -*-
+import pytest
+
+from bw_save_game.veilguard import data, paramdb
+from bw_save_game.veilguard.paramdb import (
+    PARAMDB_STRUCT,
+    VEC4_PARAMDB_STRUCT,
+    get_ParamDbKeyData_label,
+    get_ParamDbKeyData_labels,
+    parse_ParamDbKeyData,
+    parse_ParamDbKeyData_list,
+)
+
+
+def _make_wrapper(handle: int, type_index: int, size: int, hash_value: int):
+    return dict(data=list(VEC4_PARAMDB_STRUCT.unpack(PARAMDB_STRUCT.pack(handle, type_index, size, hash_value))))
+
+
+@pytest.fixture(autouse=True)
+def paramdb_keys(monkeypatch):
+    monkeypatch.setitem(vars(data), "PARAMDB_KEYS", {1234: dict(name="SkinTone", type_name="Vec4")})
+    paramdb._decode_ParamDbKey.cache_clear()
+    paramdb._get_ParamDbKey_label.cache_clear()
+
+
+def test_parse():
+    key = parse_ParamDbKeyData(_make_wrapper(7, 2, 16, 1234))
+    assert (key.handle, key.type_index, key.size, key.hash) == (7, 2, 16, 1234)
+    assert parse_ParamDbKeyData(_make_wrapper(7, 2, 16, 1234)) is key
+
+
+def test_labels():
+    known = _make_wrapper(7, 2, 16, 1234)
+    unknown = _make_wrapper(8, 1, 4, 5678)
+    assert get_ParamDbKeyData_label(known) == "ParamDb: SkinTone (Vec4)"
+    assert get_ParamDbKeyData_label(unknown) == "ParamDb: handle=8 type=1 size=4 hash=5678"
+    assert get_ParamDbKeyData_labels([known, unknown, known]) == [
+        "ParamDb: SkinTone (Vec4)",
+        "ParamDb: handle=8 type=1 size=4 hash=5678",
+        "ParamDb: SkinTone (Vec4)",
+    ]
+    assert get_ParamDbKeyData_labels([]) == []
+
+
+def test_parse_list():
+    keys = parse_ParamDbKeyData_list([_make_wrapper(i, 1, 4, 1000 + i) for i in range(5)])
+    assert [(k.handle, k.hash) for k in keys] == [(i, 1000 + i) for i in range(5)]
@@ -16,12 +16,22 @@
 #
 # Website: https://github.com/timniederhausen/bw_save_game
 # -*- coding: utf-8 -*-
+import pickle
+
+import pytest
+
+from bw_save_game.db_object import Long
 from bw_save_game.persistence import (
     EcoPersistenceKey,
     PersistenceFamilyId,
+    PersistenceInstanceList,
     RegisteredPersistenceKey,
+    get_persisted_value,
+    get_persisted_values,
     parse_persistence_key_string,
     registered_persistence_key,
+    set_persisted_value,
+    set_persisted_values,
 )
 
 
@@ -68,3 +78,90 @@ def test_key_serialization_eco():
 
 def test_static_keys():
     assert str(registered_persistence_key(1647819227)) == "7:Registered:3237998318|1647819227|0"
+
+
+def test_key_value_semantics():
+    key_str = "7:Registered:3237998318|uid=122476741|1522966120|0"
+    key = parse_persistence_key_string(key_str)
+
+    # parsed keys are cached & shared, so they must not be mutable
+    assert parse_persistence_key_string(key_str) is key
+    with pytest.raises(AttributeError):
+        key.definition_id = 1
+
+    same_key = RegisteredPersistenceKey(7, PersistenceFamilyId.Registered, 1522966120, 0, 122476741, 3237998318)
+    assert key == same_key
+    assert hash(key) == hash(same_key)
+    assert key != EcoPersistenceKey(7, PersistenceFamilyId.Registered, 1522966120, 0)
+    assert {key: 1}[same_key] == 1
+    assert pickle.loads(pickle.dumps(key)) == key
+    assert repr(registered_persistence_key(1)).startswith("RegisteredPersistenceKey(version=7, ")
+
+
+def test_batch_persisted_values():
+    instance = dict(PropertyValueData=dict(DefinitionProperties=[]))
+    set_persisted_value(instance, 1, "Boolean", True)
+    set_persisted_values(instance, [(1, "Boolean", False), (2, "Int32", 7), (2, "Int32", 8)])
+
+    assert len(instance["PropertyValueData"]["DefinitionProperties"]) == 2
+    assert get_persisted_value(instance, 1, "Boolean", None) is False
+    assert get_persisted_value(instance, 2, "Int32", None) == 8
+    assert get_persisted_values(instance, [(2, "Int32", 0), (3, "Uint32", 5), (1, "Boolean", True)]) == [8, 5, False]
+
+
+def _make_instance(definition_id: int) -> dict:
+    return dict(DefinitionId=Long(definition_id), Key=str(registered_persistence_key(definition_id)))
+
+
+def test_persistence_instance_list_indexes():
+    first, second, third = _make_instance(1), _make_instance(2), _make_instance(1)
+    instances = PersistenceInstanceList([first, second])
+
+    assert instances.key_to_instance[registered_persistence_key(2)] is second
+    assert instances.definition_id_to_instances[1] == [first]
+
+    # the last instance for a key wins, removing it falls back to the previous one
+    instances.append(third)
+    assert instances.key_to_instance[registered_persistence_key(1)] is third
+    assert len(instances.definition_id_to_instances[1]) == 2
+    del instances[2]
+    assert instances.key_to_instance[registered_persistence_key(1)] is first
+
+    instances[1] = third
+    assert registered_persistence_key(2) not in instances.key_to_instance
+    assert instances.definition_id_to_instances[2] == []
+
+    instances[:] = [second]
+    assert list(instances.key_to_instance.values()) == [second]
+    assert instances.pop() is second
+    assert not instances.key_to_instance
+
+    copied = pickle.loads(pickle.dumps(PersistenceInstanceList([first])))
+    assert copied == [first]
+    assert copied.key_to_instance[registered_persistence_key(1)] == first
+
+
+def test_persistence_instance_list_order():
+    first, second, other = _make_instance(1), _make_instance(1), _make_instance(2)
+    key = registered_persistence_key(1)
+
+    # the winner is the last instance in the list, not the last one added
+    instances = PersistenceInstanceList([first, other])
+    instances.insert(0, second)
+    assert instances.key_to_instance[key] is first
+    assert instances.definition_id_to_instances[1] == [second, first]
+
+    instances.reverse()
+    assert instances.key_to_instance[key] is second
+    instances.sort(key=lambda instance: instance is second)
+    assert instances.key_to_instance[key] is second
+    instances.sort(key=lambda instance: instance is first)
+    assert instances.key_to_instance[key] is first
+
+    # remove() looks for the very same instance, not an equal one
+    assert first == second
+    instances.remove(second)
+    assert instances.key_to_instance[key] is first
+    assert [i for i in instances if i is first]
+    with pytest.raises(ValueError):
+        instances.remove(second)
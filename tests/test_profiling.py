@@ -0,0 +1,78 @@
+# bw-save-game - BioWare save game tools
+# Copyright (C) 2024 Tim Niederhausen
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Website: https://github.com/timniederhausen/bw_save_game
+# -*- coding: utf-8 -*-
+import sys
+
+from bw_save_game import convert
+from bw_save_game.profiling import NULL_STATS, PipelineStats, count_objects
+from bw_save_game.veilguard.highlevel import VeilguardSaveGame
+
+
+def test_pipeline_stats():
+    stats = PipelineStats()
+    for _ in range(2):
+        with stats.stage("gunzip") as s:
+            s.bytes_in += 10
+            s.objects += 1
+    assert stats["gunzip"].calls == 2
+    assert stats["gunzip"].bytes_in == 20
+    assert stats.as_dict()["gunzip"]["objects"] == 2
+    assert "gunzip" in stats.format_report()
+
+    with NULL_STATS.stage("gunzip") as s:
+        s.bytes_in += 10
+    assert not NULL_STATS.enabled
+
+    assert count_objects({"a": [1, 2], "b": {"c": 3}}) == 6
+
+
+def test_save_game_stats(tmp_path, save_game_path):
+    stats = PipelineStats()
+    with open(save_game_path, "rb") as f:
+        save_game = VeilguardSaveGame.from_file(f, stats=stats)
+
+    for name in ("read", "crc", "gunzip", "decode", "build indexes"):
+        assert stats[name].calls >= 1
+    assert stats["read"].bytes_out == stats["gunzip"].bytes_in
+    assert stats["gunzip"].bytes_out == stats["decode"].bytes_in
+    assert stats["decode"].calls == 2
+    assert stats["decode"].objects > 0
+
+    save_game.to_file(tmp_path / "out.csav", stats=stats)
+    for name in ("encode", "gzip", "write", "write file"):
+        assert stats[name].calls == (2 if name == "encode" else 1)
+    assert stats["encode"].objects == stats["decode"].objects
+    assert stats["write file"].bytes_in == (tmp_path / "out.csav").stat().st_size
+
+
+def test_convert_profile(tmp_path, monkeypatch, capsys, save_game_path):
+    json_path = tmp_path / "save.json"
+    monkeypatch.setattr(sys, "argv", ["csav2json", "--profile", str(save_game_path), str(json_path)])
+    convert.run_to_json()
+    report = capsys.readouterr().err
+    assert "gunzip" in report and "json dump" in report
+
+    monkeypatch.setattr(sys, "argv", ["json2csav", "--profile", str(json_path), str(tmp_path / "save.csav")])
+    convert.run_to_bin()
+    report = capsys.readouterr().err
+    assert "json load" in report and "gzip" in report
+
+    # no report without --profile
+    monkeypatch.setattr(sys, "argv", ["json2csav", str(json_path), str(tmp_path / "save.csav")])
+    convert.run_to_bin()
+    assert capsys.readouterr().err == ""
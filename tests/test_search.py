@@ -0,0 +1,108 @@
+# bw-save-game - BioWare save game tools
+# Copyright (C) 2024 Tim Niederhausen
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Website: https://github.com/timniederhausen/bw_save_game
+# -*- coding: utf-8 -*-
+import random
+import re
+
+import pytest
+
+from bw_save_game import search
+from bw_save_game.search import LabelIndex, get_label_index
+
+LABELS = [
+    "Quest_Main_Prologue (The Lighthouse)",
+    "Quest_Main_Minrathous",
+    "Quest_Side_Treviso",
+    "Follower_Harding",
+    "Follower_Lucanis",
+    "lighthouse_upgrade",
+    "",
+    "abc",
+]
+
+
+def _reference(labels, pattern):
+    compiled = re.compile(pattern, re.IGNORECASE)
+    return [i for i, label in enumerate(labels) if compiled.search(label)]
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [
+        "",
+        "a",
+        "ab",
+        "lighthouse",
+        "LIGHTHOUSE",
+        "main_m",
+        "Quest_Side",
+        "xyz",
+        "^quest",
+        "^follower_l",
+        "^",
+        "house$",
+        "(Harding|Lucanis)",
+        "quest.*lighthouse",
+    ],
+)
+def test_search_matches_regex(pattern):
+    assert LabelIndex(LABELS).search(pattern) == _reference(LABELS, pattern)
+
+
+def test_search_randomized():
+    rng = random.Random(1234)
+    labels = ["".join(rng.choice("abcAB_ ") for _ in range(rng.randrange(12))) for _ in range(500)]
+    index = LabelIndex(labels)
+    for _ in range(200):
+        pattern = "".join(rng.choice("abAB_ ") for _ in range(rng.randrange(1, 6)))
+        if rng.random() < 0.3:
+            pattern = "^" + pattern
+        assert index.search(pattern) == _reference(labels, pattern)
+
+
+def test_invalid_pattern():
+    with pytest.raises(re.error):
+        LabelIndex(LABELS).search("(")
+
+
+def test_matches_is_cached():
+    index = LabelIndex(LABELS)
+    result = index.matches("follower")
+    assert result == {3, 4}
+    assert index.matches("follower") is result
+
+
+def test_get_label_index():
+    labels = LABELS * 10
+    assert get_label_index(labels) is get_label_index(labels)
+    assert get_label_index(labels) is not get_label_index(LABELS * 10)
+
+    # rebuilt after the list grew
+    index = get_label_index(labels)
+    labels.append("Quest_Side_New")
+    assert get_label_index(labels) is not index
+    assert get_label_index(labels).search("side_new") == [len(labels) - 1]
+
+    # only a few indices are kept alive
+    for _ in range(100):
+        get_label_index(LABELS * 10)
+    assert len(search._label_indices) <= search._LABEL_INDEX_CACHE_SIZE
+
+    # short lists aren't cached at all
+    assert get_label_index(LABELS) is not get_label_index(LABELS)
+    assert get_label_index(LABELS).search("^follower") == [3, 4]
@@ -0,0 +1,85 @@
+# bw-save-game - BioWare save game tools
+# Copyright (C) 2024 Tim Niederhausen
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Website: https://github.com/timniederhausen/bw_save_game
+# -*- coding: utf-8 -*-
+from io import BytesIO
+
+import pytest
+
+from bw_save_game import loads, read_save_from_reader
+from bw_save_game.db_object import Long, to_native
+from bw_save_game.veilguard.highlevel import VeilguardSaveGame
+from bw_save_game.veilguard.synthetic import generate_save_data, generate_save_file
+
+
+@pytest.fixture(scope="module")
+def template(save_game_path):
+    with open(save_game_path, "rb") as f:
+        meta, data = read_save_from_reader(f)
+    return loads(meta), loads(data)
+
+
+def test_generate_save_data(template):
+    original = VeilguardSaveGame(*template)
+    num_items = len(original.get_items())
+    num_instances = len(original.get_persistence_instances())
+
+    save_game = VeilguardSaveGame(*generate_save_data(*template, scale=10))
+    assert len(save_game.get_items()) == num_items * 10
+    instances = save_game.get_persistence_instances()
+    assert len(instances) == num_instances * 10
+    # all keys (and item guids) are unique, so the indexes see every instance
+    assert len(instances.key_to_instance) == len(instances)
+    assert len({item["instanceGuid"] for item in save_game.get_items()}) == len(save_game.get_items())
+
+    # the template is left alone
+    assert len(original.get_items()) == num_items
+
+
+def test_generate_save_data_counts(template):
+    meta, data = generate_save_data(
+        *template, num_items=5, num_persistence_instances=200, properties_per_instance=50, seed=1
+    )
+    save_game = VeilguardSaveGame(meta, data)
+    assert len(save_game.get_items()) == 5
+    instances = save_game.get_persistence_instances()
+    assert len(instances) == 200
+    assert len(instances[-1]["PropertyValueData"]["DefinitionProperties"]) == 50
+
+    assert generate_save_data(*template, num_items=5, num_persistence_instances=200, seed=1) == generate_save_data(
+        *template, num_items=5, num_persistence_instances=200, seed=1
+    )
+
+
+def test_generate_save_file(save_game_path):
+    output = BytesIO()
+    with open(save_game_path, "rb") as f:
+        generate_save_file(f, output, scale=3)
+
+    output.seek(0)
+    save_game = VeilguardSaveGame.from_file(output)
+    assert len(save_game.get_persistence_instances()) > 200
+
+
+def test_generate_save_data_long_loadpass(template):
+    meta, data = template
+    data = dict(data, server=dict(data["server"]))
+    data["server"]["contributors"] = [
+        dict(c, loadpass=Long(to_native(c["loadpass"]))) for c in data["server"]["contributors"]
+    ]
+    meta, data = generate_save_data(meta, data, num_items=3)
+    assert len(VeilguardSaveGame(meta, data).get_items()) == 3
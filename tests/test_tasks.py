@@ -0,0 +1,84 @@
+# bw-save-game - BioWare save game tools
+# Copyright (C) 2024 Tim Niederhausen
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Website: https://github.com/timniederhausen/bw_save_game
+# -*- coding: utf-8 -*-
+import threading
+
+import pytest
+
+from bw_save_game.tasks import BackgroundTask, OperationCancelled
+from bw_save_game.veilguard.highlevel import VeilguardSaveGame
+
+
+def test_task_result():
+    def work(on_progress):
+        on_progress("Working", 0.5)
+        return 42
+
+    task = BackgroundTask("test", work).start()
+    assert task.wait(5)
+    assert task.is_done()
+    assert task.result == 42 and task.error is None
+    assert task.stage == "Working" and task.fraction == 1.0
+
+
+def test_task_error():
+    def work(on_progress):
+        raise ValueError("broken")
+
+    task = BackgroundTask("test", work).start()
+    assert task.wait(5)
+    assert isinstance(task.error, ValueError)
+    assert not task.is_cancelled()
+
+
+def test_task_cancel():
+    started = threading.Event()
+    resume = threading.Event()
+
+    def work(on_progress):
+        on_progress("First", 0.0)
+        started.set()
+        resume.wait(5)
+        on_progress("Second", 0.5)
+        pytest.fail("not cancelled")
+
+    task = BackgroundTask("test", work).start()
+    assert started.wait(5)
+    task.cancel()
+    resume.set()
+    assert task.wait(5)
+    assert task.is_cancelled()
+    assert isinstance(task.error, OperationCancelled)
+    assert task.stage == "First"
+
+
+def test_save_game_progress(save_game_path):
+    stages = []
+    with open(save_game_path, "rb") as f:
+        save_game = VeilguardSaveGame.from_file(f, lambda stage, fraction: stages.append((stage, fraction)))
+    assert [s for s, _ in stages] == ["Reading", "Decoding metadata", "Decoding data", "Building indexes"]
+    assert [f for _, f in stages] == sorted(f for _, f in stages)
+    assert save_game.get_persistence_instances()
+
+    def cancel(stage, fraction):
+        if stage == "Decoding data":
+            raise OperationCancelled()
+
+    with open(save_game_path, "rb") as f:
+        with pytest.raises(OperationCancelled):
+            VeilguardSaveGame.from_file(f, cancel)